@@ -0,0 +1,324 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+import build_index
+import corpus
+import generate_exercise
+import generate_vocab
+from models import Word
+
+# 計測結果の履歴（コミットごと・語数ごと）
+HISTORY_PATH = Path(__file__).resolve().parent / 'benchmarks' / 'history.json'
+DEFAULT_SIZES = (2000, 20000)
+# 合成コーパスの1ファイルあたりのメイン単語数（実データの vocabulary_data_N.json と同程度）
+MAIN_WORDS_PER_FILE = 40
+
+SYLLABLES = ['ab', 'con', 'de', 'ex', 'in', 'pro', 're', 'sub', 'trans', 'ver', 'ti', 'la', 'men',
+             'gra', 'struct', 'pli', 'cate', 'sen', 'ous', 'ment', 'ity', 'ize', 'al', 'ive', 'ate']
+POS_LIST = ['名詞', '動詞', '形容詞', '副詞', '形容詞、名詞', '動詞、名詞']
+MEANING_CHARS = '複雑構造規制受入判断影響発展維持感情社会技術理解困難状態明快単純'
+SECTION_TITLES = ['例文', '例文（名詞）', '例文（動詞）', '例文（形容詞）']
+
+
+# ==========================================
+# 1. 合成コーパスの生成
+# ==========================================
+def make_word(rng):
+    """それらしい綴りの英単語を作る"""
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def make_meaning(rng):
+    return '、'.join(''.join(rng.choice(MEANING_CHARS) for _ in range(rng.randint(2, 4)))
+                    for _ in range(rng.randint(1, 3)))
+
+
+def make_refs(rng, headwords, count):
+    """synonyms / antonyms / related の項目。一部は実データと同様に link を手書きで持つ"""
+    refs = []
+    for _ in range(count):
+        number, word = rng.choice(headwords) if headwords else (None, make_word(rng))
+        ref = {'word': word, 'trans': make_meaning(rng)}
+        if number is not None and rng.random() < 0.05:
+            ref['link'] = f"{number}-{word}.html"
+        refs.append(ref)
+    return refs
+
+
+def make_entry(rng, number, word, headwords):
+    """vocabulary_data_*.json の1語分（実データと同じキー構成）"""
+    sections = []
+    for title in rng.sample(SECTION_TITLES, rng.choice((1, 1, 1, 2))):
+        sections.append({
+            'title': title,
+            'examples': [{
+                'en': f"The {word} of the {make_word(rng)} can be {make_word(rng)} in many cases.",
+                'ja': f"{make_meaning(rng)}の{make_meaning(rng)}は、多くの場合{make_meaning(rng)}である。",
+                'highlight': word,
+            } for _ in range(rng.randint(1, 3))],
+        })
+    return {
+        'number': number,
+        'word': word,
+        'pos': rng.choice(POS_LIST),
+        'meaning': make_meaning(rng),
+        'etymology': f"ラテン語 {make_word(rng)} ({make_meaning(rng)}) <br>→ {make_meaning(rng)}",
+        'nuance': f"{make_meaning(rng)}を表します。M&A などの文脈で「{make_meaning(rng)}」を強調します。",
+        'example_sections': sections,
+        'synonyms': make_refs(rng, headwords, rng.randint(1, 3)),
+        'antonyms': make_refs(rng, headwords, rng.randint(0, 2)),
+        'related': make_refs(rng, headwords, rng.randint(0, 2)),
+    }
+
+
+def generate_synthetic_corpus(size, out_dir, seed=0):
+    """size 語の合成コーパスを out_dir/vocabulary_data_N.json に書き出す（約15%がサブ単語）"""
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    headwords = []
+    files = []
+    number = 0
+    count = 0
+    while count < size:
+        words = []
+        for _ in range(MAIN_WORDS_PER_FILE):
+            if count >= size:
+                break
+            number += 1
+            word = make_word(rng)
+            words.append(make_entry(rng, number, word, headwords))
+            headwords.append((number, word))
+            count += 1
+            # サブ単語（"N-2", "N-3" ...）
+            sub = 2
+            while count < size and rng.random() < 0.15:
+                words.append(make_entry(rng, f"{number}-{sub}", make_word(rng), headwords))
+                sub += 1
+                count += 1
+        path = out_dir / f"vocabulary_data_{len(files) + 1}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'words': words}, f, ensure_ascii=False, indent=2)
+        files.append(path)
+    return files
+
+
+# ==========================================
+# 2. ステージの計測
+# ==========================================
+def bench_load(context):
+    return len(corpus.load_sorted_words(verbose=False))
+
+
+def bench_pages(context):
+    generate_vocab.generate_pages(context['words'], force=context['force'], jobs=context['jobs'])
+
+
+def bench_index(context):
+    build_index.generate_index(context['words'])
+
+
+def bench_exercise(context):
+    generate_exercise.generate_html(context['words'])
+
+
+# (計測名, 処理, 追加コンテキスト)。順番に実行する（cold はキャッシュ無し、warm はキャッシュあり）
+BENCH_STAGES = [
+    ('load_cold', bench_load, {}),
+    ('load_warm', bench_load, {}),
+    ('pages', bench_pages, {'force': True}),
+    ('pages_noop', bench_pages, {'force': False}),
+    ('index', bench_index, {}),
+    ('exercise', bench_exercise, {}),
+]
+
+
+def run_measured(func, context):
+    """子プロセス内で1ステージを実行し、経過時間とピークRSSを返す。
+    fork した子のピークRSSは親の使用量から始まるので、読み込み済みデータ込みの値になる"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        func(context)
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'wall': round(wall, 4), 'cpu': round(cpu, 4), 'peak_rss_kb': peak_kb}
+
+
+def bench_size(size, jobs=1, seed=0, keep=False):
+    """合成コーパスを一時ディレクトリに作り、その中で各ステージを計測する"""
+    workdir = Path(tempfile.mkdtemp(prefix=f'vocab-bench-{size}-'))
+    origin = os.getcwd()
+    results = {}
+    try:
+        started = time.perf_counter()
+        generate_synthetic_corpus(size, workdir, seed=seed)
+        print(f"  合成コーパス {size:,} 語を生成 ({time.perf_counter() - started:.2f}s): {workdir}")
+
+        # 生成スクリプトはカレントディレクトリ基準で読み書きする
+        os.chdir(workdir)
+        context = {'jobs': jobs}
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            context['words'] = corpus.load_sorted_words(verbose=False)
+        os.remove(corpus.CACHE_PATH)
+
+        fork = get_context('fork')
+        for name, func, extra in BENCH_STAGES:
+            # ステージごとに新しい子プロセスで実行し、ピークRSSを分けて測る
+            with ProcessPoolExecutor(max_workers=1, mp_context=fork) as executor:
+                results[name] = executor.submit(run_measured, func, dict(context, **extra)).result()
+            r = results[name]
+            print(f"  {name:<12} {r['wall']:>9.3f}s  cpu {r['cpu']:>9.3f}s  peak {r['peak_rss_kb'] / 1024:>8.1f} MiB")
+    finally:
+        os.chdir(origin)
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+# ==========================================
+# 3. テンプレート描画の比較
+# ==========================================
+def bench_render(count, seed=0, repeat=3):
+    """単語ページの描画だけを比べる（ファイルには書かない）。
+    format: 出力片を連結してから str.format で差し込む従来の方式
+    template: コンパイル済みテンプレートで出力片のリストに描画して連結（エスケープ込み）"""
+    rng = random.Random(seed)
+    words = [Word.from_dict(make_entry(rng, i + 1, make_word(rng), [])) for i in range(count)]
+    values = [generate_vocab.get_page_values(w, 'prev.html', 'next.html') for w in words]
+    # str.format はエスケープ指定（:attr）を解釈できないので外す
+    format_source = generate_vocab.HTML_TEMPLATE_MAIN.replace(':attr}', '}')
+    template = generate_vocab.PAGE_TEMPLATE_MAIN
+
+    def with_format():
+        for v in values:
+            format_source.format(**{k: ''.join(x) if type(x) is list else x for k, x in v.items()})
+
+    def with_template():
+        for v in values:
+            ''.join(template.render_into([], v))
+
+    def full_page():
+        for w in words:
+            ''.join(generate_vocab.render_page(w, 'prev.html', 'next.html'))
+
+    results = {}
+    for name, func in (('format', with_format), ('template', with_template), ('render_page', full_page)):
+        best = min(timeit_once(func) for _ in range(repeat))
+        results[name] = {'wall': round(best, 4), 'pages_per_sec': round(count / best)}
+        print(f"  {name:<12} {best:>9.3f}s  {count / best:>10,.0f} pages/s")
+    return results
+
+
+def timeit_once(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+# ==========================================
+# 4. 履歴
+# ==========================================
+def get_git_commit():
+    """現在のコミット（未コミットの変更があれば "-dirty" 付き）"""
+    cwd = Path(__file__).resolve().parent
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=cwd,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if dirty else '')
+
+
+def load_history(path=HISTORY_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_history(history, path=HISTORY_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=1)
+        f.write('\n')
+
+
+def compare_with_previous(history, commit, size, results):
+    """同じ語数で計測した直前のコミットと比べて、ステージごとの増減を表示"""
+    previous = [(entry['timestamp'], key) for key, entry in history.items()
+                if key != commit and str(size) in entry['sizes']]
+    if not previous:
+        return
+    _, base_commit = max(previous)
+    base = history[base_commit]['sizes'][str(size)]
+    print(f"  比較対象: {base_commit}")
+    for name, r in results.items():
+        if name not in base:
+            continue
+        ratio = r['wall'] / base[name]['wall'] if base[name]['wall'] else float('inf')
+        mark = '⚠' if ratio > 1.2 else ' '
+        print(f"  {mark} {name:<12} {base[name]['wall']:>9.3f}s → {r['wall']:>9.3f}s  (x{ratio:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='合成コーパスで各生成ステージの処理時間とピークメモリを計測')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='計測する語数（例: 2000 20000 200000）')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='単語ページ生成のワーカープロセス数')
+    parser.add_argument('--seed', type=int, default=0, help='合成コーパスの乱数シード')
+    parser.add_argument('--history', type=Path, default=HISTORY_PATH, help='結果を追記する履歴ファイル')
+    parser.add_argument('--no-save', action='store_true', help='履歴ファイルに保存しない')
+    parser.add_argument('--keep', action='store_true', help='一時ディレクトリを削除せずに残す')
+    parser.add_argument('--render', type=int, metavar='N',
+                        help='ステージ計測の代わりに N 語分のページ描画（str.format とテンプレート）を比較')
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    commit = get_git_commit()
+    entry = history.setdefault(commit, {'sizes': {}})
+    entry.update({
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': sys.platform,
+        'cpu_count': os.cpu_count(),
+        'jobs': args.jobs,
+    })
+
+    if args.render:
+        print(f"\n▶ ページ描画 {args.render:,} 語")
+        entry['render'] = bench_render(args.render, seed=args.seed)
+        args.sizes = []
+
+    for size in args.sizes:
+        print(f"\n▶ {size:,} 語")
+        results = bench_size(size, jobs=args.jobs, seed=args.seed, keep=args.keep)
+        compare_with_previous(history, commit, size, results)
+        entry['sizes'][str(size)] = results
+
+    if not args.no_save:
+        save_history(history, args.history)
+        print(f"\n📝 {args.history} に記録しました（{commit}）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import contextlib
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+import build_index
+import chapters
+import compress_assets
+import corpus
+import dictionary
+import export_sqlite
+import generate_exercise
+import generate_vocab
+import metrics
+import service_worker
+
+# ==========================================
+# 1. ビルドステージ
+# ==========================================
+# 各ステージは context（dict）を受け取り、必要なら結果を書き込む。
+# 単語データは load ステージで一度だけ読み込み、後続ステージはそれを共有する。
+# serve.py --watch は context を使い回し（'incremental'）、変更のあったチャプターだけを
+# context['changed_chapters'] に入れる（None なら全体）。途中結果は context['cache'] に覚えておく。
+
+def stage_load(context):
+    """vocabulary_data*.json を読み込み、番号順にソートしたモデルを作る"""
+    sorted_words = corpus.load_sorted_words(verbose=not context.get('quiet', False))
+    if not sorted_words:
+        # 空のデータで後続ステージを走らせると既存ページを消してしまうため中断
+        raise RuntimeError("単語データが読み込めませんでした")
+    previous_words = context.get('words')
+    context['words'] = sorted_words
+    context['changed_chapters'] = None
+    if context.get('incremental') and previous_words is not None:
+        context['changed_chapters'] = chapters.find_changed_chapters(
+            chapters.build_chapter_index(), previous_words, sorted_words)
+
+
+def get_stage_cache(context, name):
+    """serve.py --watch のときだけ、ステージごとの途中結果を覚えておく dict（それ以外は None）"""
+    if not context.get('incremental'):
+        return None
+    return context.setdefault('cache', {}).setdefault(name, {})
+
+
+def stage_pages(context):
+    """単語ページ data/*.html を生成"""
+    generate_vocab.generate_pages(context['words'], force=context['force'], jobs=context['jobs'],
+                                  minify=context.get('minify', False), quiet=context.get('quiet', False))
+
+
+def stage_index(context):
+    """index.html を生成"""
+    build_index.generate_index(context['words'], sharded=context.get('sharded_index', False),
+                               changed_chapters=context.get('changed_chapters'),
+                               cache=get_stage_cache(context, 'index'))
+
+
+def stage_exercise(context):
+    """exercise.html を生成"""
+    generate_exercise.generate_html(context['words'], changed_chapters=context.get('changed_chapters'),
+                                    cache=get_stage_cache(context, 'exercise'))
+
+
+def stage_dictionary(context):
+    """lookup.py で引くバイナリ辞書 dictionary.bin を生成"""
+    dictionary.write_dictionary(context['words'])
+
+
+def stage_sqlite(context):
+    """分析用の SQLite（vocabulary.sqlite3）を、変更のあった JSON の分だけ更新"""
+    export_sqlite.export_sqlite(force=context['force'])
+
+
+def stage_service_worker(context):
+    """sw.js と sw-manifest.json（キャッシュ対象の内容ハッシュ）を生成"""
+    service_worker.generate_service_worker()
+
+
+def stage_compress(context):
+    """生成物の .gz / .br と asset-manifest.json を作る"""
+    compress_assets.compress_assets(jobs=context['jobs'])
+
+
+# ステージ名: (依存するステージ, 処理)
+STAGES = {
+    'load': ((), stage_load),
+    'pages': (('load',), stage_pages),
+    'index': (('load',), stage_index),
+    'exercise': (('load',), stage_exercise),
+    'dictionary': (('load',), stage_dictionary),
+    'sqlite': ((), stage_sqlite),
+    'sw': (('pages', 'index', 'exercise'), stage_service_worker),
+    'compress': (('pages', 'index', 'exercise', 'sw'), stage_compress),
+}
+
+# 明示的に指定したときだけ実行するステージ
+OPTIONAL_STAGES = {'compress', 'dictionary', 'sqlite'}
+
+
+# ==========================================
+# 2. 依存グラフの実行
+# ==========================================
+def resolve_stages(targets):
+    """指定ステージとその依存ステージをすべて集める"""
+    selected = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name in selected:
+            continue
+        if name not in STAGES:
+            raise ValueError(f"未知のステージです: {name}")
+        selected.add(name)
+        pending.extend(STAGES[name][0])
+    return selected
+
+
+class LineWriter:
+    """並行するステージのログが行の途中で混ざらないよう、スレッドごとに1行ずつまとめて書き出す"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def write(self, text):
+        head, newline, rest = (getattr(self.local, 'buffer', '') + text).rpartition('\n')
+        self.local.buffer = rest
+        if newline:
+            with self.lock:
+                self.stream.write(head + newline)
+        return len(text)
+
+    def flush(self):
+        rest, self.local.buffer = getattr(self.local, 'buffer', ''), ''
+        with self.lock:
+            self.stream.write(rest)
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def run_stage(name, func, context):
+    """1ステージを実行（計測が有効なら区間として記録）"""
+    with metrics.measure(name):
+        try:
+            func(context)
+        finally:
+            sys.stdout.flush()
+
+
+def run_stages(context, targets=None, max_workers=None):
+    """依存関係を満たしたステージから順に実行する。互いに独立なステージは並行実行。
+    計測中は区間が重ならないよう1つずつ実行する"""
+    if metrics.is_enabled():
+        max_workers = 1
+    selected = resolve_stages(targets or [name for name in STAGES if name not in OPTIONAL_STAGES])
+    done = set()
+    running = {}
+
+    with contextlib.redirect_stdout(LineWriter(sys.stdout)), ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while len(done) < len(selected):
+            for name in sorted(selected - done - set(running.values())):
+                deps, func = STAGES[name]
+                if all(dep in done for dep in deps if dep in selected):
+                    running[executor.submit(run_stage, name, func, context)] = name
+
+            if not running:
+                raise RuntimeError("ステージの依存関係が循環しています")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                future.result()  # 例外はここで再送出してビルドを止める
+                done.add(name)
+                print(f"■ ステージ完了: {name}")
+    return context
+
+
+def main():
+    parser = argparse.ArgumentParser(description='単語ページ・index.html・exercise.html を1プロセスでまとめて生成')
+    parser.add_argument('stages', nargs='*', help=f'実行するステージ（省略時はすべて）: {", ".join(STAGES)}')
+    parser.add_argument('--force', action='store_true', help='マニフェストを無視して全ページを再生成')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='単語ページ生成のワーカープロセス数（0 でCPUコア数）')
+    parser.add_argument('--minify', action='store_true', help='単語ページのHTMLからタグ間の空白を取り除く')
+    parser.add_argument('--sharded-index', action='store_true',
+                        help='index.html の一覧をチャプターごとの JSON に分けて遅延読み込みにする')
+    parser.add_argument('--compress', action='store_true', help='最後に .gz / .br を事前生成する（compress ステージ）')
+    parser.add_argument('--serial', action='store_true', help='ステージを並行実行せず1つずつ実行')
+    parser.add_argument('--quiet', '-q', action='store_true', help='ファイルごとのログを出さない')
+    parser.add_argument('--profile', action='store_true',
+                        help='ステージごとの経過時間・CPU時間・I/O・メモリのピークを表示（ステージは1つずつ実行）')
+    parser.add_argument('--metrics-out', type=Path, help='計測結果を JSON で書き出すパス（--profile を含む）')
+    args = parser.parse_args()
+
+    if args.profile or args.metrics_out:
+        metrics.enable()
+
+    context = {
+        'force': args.force,
+        'jobs': args.jobs or os.cpu_count() or 1,
+        'sharded_index': args.sharded_index,
+        'minify': args.minify,
+        'quiet': args.quiet,
+    }
+    targets = list(args.stages)
+    if args.compress:
+        targets = (targets or [name for name in STAGES if name not in OPTIONAL_STAGES]) + ['compress']
+    try:
+        run_stages(context, targets, max_workers=1 if args.serial else None)
+    except corpus.CorpusError as e:
+        # load で止まるので、ページの削除や索引の書き換えは行われない
+        sys.exit(f"❌ {e}")
+    if args.profile:
+        metrics.print_summary()
+    if args.metrics_out:
+        metrics.write_report(args.metrics_out)
+        print(f"📝 計測結果: {args.metrics_out}")
+    print("\n✅ ビルド完了")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,49 +1,480 @@
-import os
+import argparse
+import json
 import re
 from collections import defaultdict
+from pathlib import Path
+import metrics
 from config import CHAPTER_MAP
+from chapters import build_chapter_index, find_chapter
+from corpus import load_sorted_words
+from models import get_filename
+from fileutil import remove_stale_files, write_if_changed
+from search_index import serialize_row, write_search_index
+from templating import Template, write_parts
+
+# シャード化モードでチャプターごとの一覧データを置く場所
+INDEX_DATA_DIR = Path('index_data')
+
+# 一覧・目次の各行のテンプレート（値のエスケープはテンプレート側で行う）
+TOC_GROUP_START = Template('''        <div class="toc-group">
+            <div class="toc-group-title">{group_name}</div>
+            <ul class="toc-links">
+''')
+TOC_LINK = Template('                <li><a href="#chapter-{s_num:attr}">{label}</a></li>\n')
+TOC_GROUP_END = '            </ul>\n        </div>\n'
+CHAPTER_HEADER = Template('        <li class="chapter-header" id="chapter-{t:attr}">{title}</li>\n')
+CHAPTER_SHARD = Template('        <li class="chapter-shard" data-shard="chapter-{t:attr}.json" style="--rows: {rows:attr}"></li>\n')
+WORD_ROW = Template('        <li class="{item_class:attr}"><a href="data/{filename:attr}">'
+                    '<span class="word-id">{display_id}</span><span class="word-name">{display_name}</span>'
+                    '{meaning}</a></li>\n')
+WORD_MEANING = Template('<span class="word-meaning">{meaning}</span>')
 
 # ==========================================
 # 1. 補助関数
 # ==========================================
-def natural_sort_key(filename):
-    parts = re.split(r'(\d+)', filename)
-    converted_parts = [int(p) if p.isdigit() else p.lower() for p in parts if p]
-    if len(converted_parts) > 1:
-        if converted_parts[1] == '.html':
-            return [converted_parts[0], 0] + converted_parts[2:]
-        else:
-            return [converted_parts[0], 1] + converted_parts[2:]
-    return converted_parts
-
-def get_base_number(filename):
-    match = re.match(r'^(\d+)', filename)
-    return int(match.group(1)) if match else 0
-
-def get_japanese_meaning(filepath):
-    """HTMLファイルからmeaning-jpクラスの日本語訳を抽出する"""
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            content = f.read()
-        match = re.search(r'<div class="meaning-jp">\s*(.*?)\s*</div>', content, re.DOTALL)
-        if match:
-            # HTMLタグを除去して返す
-            text = re.sub(r'<[^>]+>', '', match.group(1)).strip()
-            return text
-    except:
-        pass
-    return ""
+def get_japanese_meaning(word_data):
+    """単語データから一覧表示用の日本語訳を取得する（HTMLタグは除去）"""
+    return re.sub(r'<[^>]+>', '', word_data.meaning).strip()
+
+def get_index_row(word_data):
+    """一覧の1行分のデータ (表示番号, 表示名, ファイル名, 日本語訳, サブ単語か) を作る"""
+    filename = get_filename(word_data)
+    word_id_full = filename.replace(".html", "")
+    display_name = re.sub(r'^[0-9-]+', '', word_id_full).replace("-", " ").strip()
+    parts = word_id_full.split("-")
+    is_sub = len(parts) > 1 and parts[1].isdigit()
+    display_id = parts[0] + ("-" + parts[1] if is_sub else "")
+    return (display_id, display_name, filename, get_japanese_meaning(word_data), is_sub)
+
+def write_chapter_shards(chapter_rows, out_dir=INDEX_DATA_DIR, changed_chapters=None):
+    """チャプターごとの一覧データ index_data/chapter-<開始番号>.json を書き出す。
+    changed_chapters（チャプターIDの集合）を渡すと、そのチャプターのファイルだけを書き直す"""
+    written = set()
+    changed = 0
+    for chapter_id, rows in chapter_rows.items():
+        filename = f"chapter-{chapter_id}.json"
+        written.add(filename)
+        if changed_chapters is not None and chapter_id not in changed_chapters and (out_dir / filename).exists():
+            continue
+        text = json.dumps([serialize_row(row) for row in rows], ensure_ascii=False, separators=(',', ':'))
+        changed += write_if_changed(out_dir / filename, text)
+    removed = remove_stale_files(out_dir, written, 'chapter-*.json')
+    print(f"📦 チャプター別データ: {len(written)} ファイル（更新 {changed} / 削除 {len(removed)}）")
 
 # ==========================================
-# 2. メイン処理
+# 2. ページ内スクリプト
 # ==========================================
-def generate_index():
-    word_dir = "data"
-    if not os.path.exists(word_dir):
-        os.makedirs(word_dir)
+# 全単語を index.html に埋め込むモード: スクロールに合わせて表示を広げる
+INLINE_LIST_SCRIPT = """    const wordList = document.getElementById('wordList');
+    const allItems = Array.from(wordList.children).filter(item => item.classList.contains('word-item'));
+    const backToTopBtn = document.getElementById('backToTop');
+    const margin = 1200;
 
-    files = [f for f in os.listdir(word_dir) if f.endswith(".html")]
-    files.sort(key=natural_sort_key)
+    function checkVisibleItems() {
+        backToTopBtn.style.display = window.scrollY > 300 ? 'flex' : 'none';
+        if (wordList.hidden) return;
+        const triggerLimit = window.innerHeight + window.scrollY + margin;
+        let hasHidden = false;
+        for (let item of allItems) {
+            if (item.classList.contains('hidden')) {
+                if (item.offsetTop < triggerLimit) {
+                    item.classList.remove('hidden');
+                } else {
+                    hasHidden = true;
+                    break;
+                }
+            }
+        }
+        document.getElementById('loadingIndicator').style.display = hasHidden ? 'block' : 'none';
+    }
+
+    function initializeLazyLoad() {
+        allItems.forEach(item => item.classList.add('hidden'));
+        checkVisibleItems();
+    }
+
+    function loadChapterAndScroll(event, chapterId) {
+        event.preventDefault();
+        const chapterHeader = document.getElementById(chapterId);
+        if (!chapterHeader) return;
+        let nextEl = chapterHeader.nextElementSibling;
+        for (let i = 0; i < 40 && nextEl; i++) {
+            if (nextEl.classList.contains('word-item')) nextEl.classList.remove('hidden');
+            nextEl = nextEl.nextElementSibling;
+        }
+        chapterHeader.scrollIntoView({ behavior: 'smooth', block: 'start' });
+        setTimeout(checkVisibleItems, 100);
+    }
+
+    window.addEventListener('scroll', () => window.requestAnimationFrame(checkVisibleItems));
+    backToTopBtn.addEventListener('click', () => window.scrollTo({ top: 0, behavior: 'smooth' }));
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('.toc-links a').forEach(link => {
+            link.addEventListener('click', (e) => loadChapterAndScroll(e, link.getAttribute('href').substring(1)));
+        });
+        initializeLazyLoad();
+    });
+
+"""
+
+# シャード化モード: チャプターごとの JSON を必要になった時点で読み込む
+SHARDED_LIST_SCRIPT = """    const wordList = document.getElementById('wordList');
+    const backToTopBtn = document.getElementById('backToTop');
+    document.getElementById('loadingIndicator').style.display = 'none';
+
+    // チャプターごとのデータ（index_data/）は、見える位置に近づいたときに読み込む
+    const shardLoads = new Map();
+    const shardObserver = new IntersectionObserver(entries => {
+        entries.forEach(entry => { if (entry.isIntersecting) loadShard(entry.target); });
+    }, { rootMargin: '1200px 0px' });
+
+    function loadShard(placeholder) {
+        if (!shardLoads.has(placeholder)) {
+            const load = fetch('index_data/' + placeholder.dataset.shard)
+                .then(r => { if (!r.ok) throw new Error(r.status); return r.json(); })
+                .then(rows => {
+                    shardObserver.unobserve(placeholder);
+                    const fragment = document.createDocumentFragment();
+                    rows.forEach(row => fragment.append(renderRow(row)));
+                    placeholder.replaceWith(fragment);
+                })
+                .catch(() => {
+                    shardLoads.delete(placeholder);
+                    placeholder.textContent = '読み込みに失敗しました';
+                });
+            shardLoads.set(placeholder, load);
+        }
+        return shardLoads.get(placeholder);
+    }
+
+    function checkVisibleItems() {
+        backToTopBtn.style.display = window.scrollY > 300 ? 'flex' : 'none';
+    }
+
+    async function loadChapterAndScroll(event, chapterId) {
+        event.preventDefault();
+        const chapterHeader = document.getElementById(chapterId);
+        if (!chapterHeader) return;
+        const placeholder = chapterHeader.nextElementSibling;
+        if (placeholder && placeholder.classList.contains('chapter-shard')) await loadShard(placeholder);
+        chapterHeader.scrollIntoView({ behavior: 'smooth', block: 'start' });
+    }
+
+    window.addEventListener('scroll', () => window.requestAnimationFrame(checkVisibleItems));
+    backToTopBtn.addEventListener('click', () => window.scrollTo({ top: 0, behavior: 'smooth' }));
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('.toc-links a').forEach(link => {
+            link.addEventListener('click', (e) => loadChapterAndScroll(e, link.getAttribute('href').substring(1)));
+        });
+        document.querySelectorAll('.chapter-shard').forEach(placeholder => shardObserver.observe(placeholder));
+    });
+
+"""
+
+# 検索（ビルド時に作成した search/ のインデックスを引く）
+SEARCH_SCRIPT = """    // ---- 検索（ビルド時に作成した search/ のインデックスを引く） ----
+    const SEARCH_LIMIT = 200;
+    // 完全一致がこれより少ないときだけ、綴り違い・意味の部分的な一致も探す
+    const FUZZY_THRESHOLD = 10;
+    const FUZZY_CANDIDATES = 50;
+    const searchResults = document.getElementById('searchResults');
+    const searchStatus = document.getElementById('searchStatus');
+    const jsonCache = new Map();
+    let searchToken = 0;
+
+    function fetchJson(url) {
+        if (!jsonCache.has(url)) {
+            jsonCache.set(url, fetch(url).then(r => r.ok ? r.json() : null).catch(() => null));
+        }
+        return jsonCache.get(url);
+    }
+
+    function isAsciiAlnum(ch) { return /^[a-z0-9]$/.test(ch); }
+
+    // 検索語と索引の正規化（search_index.py の fold_text / split_senses と同じ規則）
+    const LABEL_RE = /【[^】]*】|〔[^〕]*〕|〈[^〉]*〉/g;
+    const SENSE_SPLIT_RE = /[\\s、，,;；\\/／\\u2460-\\u2473\\u3251-\\u325f\\u32b1-\\u32bf]+/;
+    const FOLD_STRIP_RE = /[()（）〜～~「」『』\\[\\]…]/g;
+    const KATAKANA_RE = /[\\u30a1-\\u30f6]/g;
+
+    function foldText(text) {
+        return text.replace(FOLD_STRIP_RE, '').normalize('NFKC').toLowerCase()
+            .replace(KATAKANA_RE, ch => String.fromCharCode(ch.charCodeAt(0) - 0x60))
+            .replace(/\\s+/g, ' ').trim();
+    }
+
+    function splitSenses(meaning) {
+        return meaning.replace(LABEL_RE, ' ').split(SENSE_SPLIT_RE).map(foldText).filter(s => s);
+    }
+
+    function shardName(ch, buckets) {
+        if (isAsciiAlnum(ch)) return ch;
+        return 'u' + (ch.codePointAt(0) % buckets).toString(16).padStart(2, '0');
+    }
+
+    function queryGrams(chars) {
+        if (chars.length === 1) return [chars[0]];
+        const grams = new Set();
+        for (let i = 0; i < chars.length - 1; i++) grams.add(chars[i] + chars[i + 1]);
+        return Array.from(grams);
+    }
+
+    function headwordTrigrams(query) {
+        const chars = Array.from('^' + query + '$');
+        const grams = new Set();
+        for (let i = 0; i < chars.length - 2; i++) grams.add(chars[i] + chars[i + 1] + chars[i + 2]);
+        return Array.from(grams);
+    }
+
+    async function loadPostings(file, gram) {
+        const shard = await fetchJson(file);
+        const deltas = shard && shard[gram];
+        if (!deltas) return [];
+        const ids = new Array(deltas.length);
+        let id = 0;
+        for (let i = 0; i < deltas.length; i++) { id += deltas[i]; ids[i] = id; }
+        return ids;
+    }
+
+    function bigramPostings(meta, gram) {
+        const name = shardName(Array.from(gram)[0], meta.buckets);
+        return meta.shards.includes(name) ? loadPostings(`search/shard-${name}.json`, gram) : Promise.resolve([]);
+    }
+
+    function trigramPostings(meta, gram) {
+        const name = shardName(Array.from(gram)[1], meta.buckets);
+        return meta.trigram_shards.includes(name) ? loadPostings(`search/tri-${name}.json`, gram) : Promise.resolve([]);
+    }
+
+    // 行番号ごとに、いくつの gram の posting に現れたかを数える（touched は1回以上現れた行）
+    function countPostings(lists, size) {
+        const counts = new Uint16Array(size);
+        const touched = [];
+        for (const list of lists) {
+            for (const id of list) {
+                if (counts[id]++ === 0) touched.push(id);
+            }
+        }
+        return { counts, touched };
+    }
+
+    // 出現数の多い順に limit 件の行番号（同数なら行番号順）
+    function topCandidates({ counts, touched }, minCount, limit, exclude) {
+        const out = touched.filter(id => counts[id] >= minCount && !exclude.has(id));
+        out.sort((a, b) => counts[b] - counts[a] || a - b);
+        return out.slice(0, limit);
+    }
+
+    // 編集距離（隣り合う2文字の入れ替えも1とする）。max を超えたら打ち切って max + 1
+    function editDistance(a, b, max) {
+        if (Math.abs(a.length - b.length) > max) return max + 1;
+        let prev2 = null;
+        let prev = Array.from({ length: b.length + 1 }, (_, j) => j);
+        for (let i = 1; i <= a.length; i++) {
+            const cur = [i];
+            let rowMin = i;
+            for (let j = 1; j <= b.length; j++) {
+                const cost = a[i - 1] === b[j - 1] ? 0 : 1;
+                let d = Math.min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost);
+                if (prev2 && i > 1 && j > 1 && a[i - 1] === b[j - 2] && a[i - 2] === b[j - 1]) d = Math.min(d, prev2[j - 2] + 1);
+                cur.push(d);
+                if (d < rowMin) rowMin = d;
+            }
+            if (rowMin > max) return max + 1;
+            prev2 = prev;
+            prev = cur;
+        }
+        return prev[b.length];
+    }
+
+    function maxTypos(length) { return length <= 4 ? 1 : length <= 8 ? 2 : 3; }
+
+    // 行データはチャンク単位でまとめて読み込み、その後は同期的に引く
+    const rowChunks = new Map();
+    const foldedRows = new Map();
+    async function loadRows(meta, ids) {
+        const pending = new Set();
+        for (const id of ids) {
+            const c = Math.floor(id / meta.chunk);
+            if (!rowChunks.has(c)) pending.add(c);
+        }
+        await Promise.all(Array.from(pending, c =>
+            fetchJson(`search/rows-${c}.json`).then(chunk => { if (chunk) rowChunks.set(c, chunk); })));
+    }
+
+    function getRow(meta, id) {
+        const chunk = rowChunks.get(Math.floor(id / meta.chunk));
+        return chunk ? chunk[id % meta.chunk] : undefined;
+    }
+
+    function getFolded(row, id) {
+        let folded = foldedRows.get(id);
+        if (!folded) {
+            folded = { id: foldText(row[0]), name: foldText(row[1]), senses: splitSenses(row[3]) };
+            foldedRows.set(id, folded);
+        }
+        return folded;
+    }
+
+    // 完全一致の順位（小さいほど上位）。一致しなければ -1
+    function exactRank(folded, query, asciiPrefixOnly) {
+        if (folded.name === query || folded.id === query) return 0;
+        if (folded.name.startsWith(query) || folded.id.startsWith(query)) return 1;
+        if (folded.senses.includes(query)) return 2;
+        if (folded.senses.some(s => s.startsWith(query))) return 3;
+        // 1文字のASCIIは前方一致だけ（"e" で全件ヒットしないように）
+        if (asciiPrefixOnly) return -1;
+        if (folded.name.includes(query) || folded.senses.some(s => s.includes(query))) return 4;
+        return -1;
+    }
+
+    // 語義ごとの bigram の重なり（Dice 係数）の最大値
+    function senseSimilarity(folded, grams) {
+        const querySet = new Set(grams);
+        let best = 0;
+        for (const sense of folded.senses) {
+            const senseGrams = queryGrams(Array.from(sense));
+            const shared = senseGrams.filter(g => querySet.has(g)).length;
+            best = Math.max(best, 2 * shared / (senseGrams.length + querySet.size));
+        }
+        return best;
+    }
+
+    // 検索結果は [順位, 補助スコア, 行番号, 行] を集めて並べる。
+    // 完全一致（順位 0〜4）の後に、綴り違い（5）と意味の部分的な一致（6）を続ける
+    async function searchIndex(rawQuery) {
+        const meta = await fetchJson('search/meta.json');
+        if (!meta) return null;
+        const query = foldText(rawQuery);
+        if (!query) return { rows: [], total: 0, fuzzy: 0 };
+        const chars = Array.from(query);
+        const grams = queryGrams(chars);
+        const counted = countPostings(await Promise.all(grams.map(g => bigramPostings(meta, g))), meta.count);
+
+        const hits = [];
+        const seen = new Set();
+        const asciiPrefixOnly = chars.length === 1 && isAsciiAlnum(chars[0]);
+        // bigram がすべて揃った行は候補なので、正規化した行データで実際に一致するか確認する
+        const candidates = counted.touched.filter(id => counted.counts[id] === grams.length);
+        await loadRows(meta, candidates);
+        for (const id of candidates) {
+            const row = getRow(meta, id);
+            if (!row) continue;
+            const rank = exactRank(getFolded(row, id), query, asciiPrefixOnly);
+            if (rank < 0) continue;
+            hits.push([rank, 0, id, row]);
+            seen.add(id);
+        }
+        const exact = hits.length;
+
+        if (exact < FUZZY_THRESHOLD && chars.length >= 2) {
+            // 綴り違い: 見出し語の trigram を多く共有する語を編集距離で確かめる
+            if (/^[a-z][a-z '-]*$/.test(query) && chars.length >= 3 && meta.trigram_shards) {
+                const trigrams = headwordTrigrams(query);
+                const triCounted = countPostings(await Promise.all(trigrams.map(g => trigramPostings(meta, g))), meta.count);
+                const limit = maxTypos(chars.length);
+                const fuzzyIds = topCandidates(triCounted, 2, FUZZY_CANDIDATES, seen);
+                await loadRows(meta, fuzzyIds);
+                for (const id of fuzzyIds) {
+                    const row = getRow(meta, id);
+                    if (!row) continue;
+                    const distance = editDistance(query, getFolded(row, id).name, limit);
+                    if (distance > limit) continue;
+                    hits.push([5, distance, id, row]);
+                    seen.add(id);
+                }
+            }
+            // 意味の部分的な一致: bigram の6割以上を含む語義を、重なりの大きい順に
+            if (grams.length >= 2) {
+                const minCount = Math.ceil(grams.length * 0.6);
+                const similarIds = topCandidates(counted, minCount, FUZZY_CANDIDATES, seen);
+                await loadRows(meta, similarIds);
+                for (const id of similarIds) {
+                    const row = getRow(meta, id);
+                    if (!row) continue;
+                    const similarity = senseSimilarity(getFolded(row, id), grams);
+                    if (similarity < 0.5) continue;
+                    hits.push([6, -similarity, id, row]);
+                    seen.add(id);
+                }
+            }
+        }
+
+        hits.sort((a, b) => a[0] - b[0] || a[1] - b[1] || a[2] - b[2]);
+        return { rows: hits.slice(0, SEARCH_LIMIT).map(hit => hit[3]), total: hits.length, fuzzy: hits.length - exact };
+    }
+
+    function renderRow(row) {
+        const [displayId, displayName, filename, meaning, isSub] = row;
+        const li = document.createElement('li');
+        li.className = isSub ? 'word-item sub-word' : 'word-item';
+        const a = document.createElement('a');
+        a.href = 'data/' + filename;
+        const idSpan = document.createElement('span');
+        idSpan.className = 'word-id';
+        idSpan.textContent = displayId;
+        const nameSpan = document.createElement('span');
+        nameSpan.className = 'word-name';
+        nameSpan.textContent = displayName;
+        a.append(idSpan, nameSpan);
+        if (meaning) {
+            const meaningSpan = document.createElement('span');
+            meaningSpan.className = 'word-meaning';
+            meaningSpan.textContent = meaning;
+            a.append(meaningSpan);
+        }
+        li.append(a);
+        return li;
+    }
+
+    async function filterList() {
+        const token = ++searchToken;
+        const filter = document.getElementById('searchInput').value.trim();
+        if (filter === "") {
+            searchResults.hidden = true;
+            searchStatus.hidden = true;
+            searchResults.replaceChildren();
+            wordList.hidden = false;
+            checkVisibleItems();
+            return;
+        }
+
+        const result = await searchIndex(filter);
+        if (token !== searchToken) return;  // 入力が進んでいたら古い結果は捨てる
+
+        wordList.hidden = true;
+        document.getElementById('loadingIndicator').style.display = 'none';
+        const fragment = document.createDocumentFragment();
+        if (result) result.rows.forEach(row => fragment.append(renderRow(row)));
+        searchResults.replaceChildren(fragment);
+        searchResults.hidden = false;
+        searchStatus.hidden = false;
+        if (!result) {
+            searchStatus.textContent = '検索インデックスを読み込めませんでした';
+        } else {
+            const fuzzy = result.fuzzy ? `（うち近い候補 ${result.fuzzy} 件）` : '';
+            searchStatus.textContent = result.total > result.rows.length
+                ? `${result.total} 件${fuzzy}中 ${result.rows.length} 件を表示`
+                : `${result.total} 件${fuzzy}`;
+        }
+    }
+
+    document.getElementById('searchInput').addEventListener('focus', () => fetchJson('search/meta.json'), { once: true });
+"""
+
+# ==========================================
+# 3. メイン処理
+# ==========================================
+def generate_index(sorted_words=None, sharded=False, changed_chapters=None, cache=None):
+    """単語データ（番号順ソート済み）から index.html を生成する。
+    省略時は vocabulary_data*.json を読み込む（生成済みHTMLは読まない）。
+    sharded=True のときは目次と見出しだけの軽いページにして、一覧はチャプターごとの JSON から読み込む。
+    serve.py --watch からは changed_chapters（変更のあったチャプターIDの集合）と、検索インデックスの
+    途中結果を覚えておく cache（dict）を渡し、チャプター別データと検索インデックスは変更分だけ書き直す"""
+    if sorted_words is None:
+        sorted_words = load_sorted_words()
 
     # 目次グループ化用
     grouped_chapters = defaultdict(list)
@@ -55,7 +486,7 @@ def generate_index():
         display_label = title.split('】')[-1] if '】' in title else title
         grouped_chapters[group_name].append((s_num, display_label))
 
-    html_content = """<!DOCTYPE html>
+    out = ["""<!DOCTYPE html>
 <html lang="ja">
 <head>
     <meta charset="UTF-8">
@@ -113,6 +544,8 @@ def generate_index():
         .sub-word .word-id { color: #6a994e; }
         
         .word-item.hidden { display: none; }
+        .chapter-shard { list-style: none; min-height: calc(var(--rows) * 52px); }
+        .search-status { color: var(--chapter-color); font-size: 0.9rem; margin: -10px 0 10px 5px; }
         .loading-indicator { text-align: center; padding: 20px; color: var(--chapter-color); }
 
         /* Back to Top Button */
@@ -131,134 +564,80 @@ def generate_index():
     <a href="exercise.html" class="exercise-link">📝 演習（クイズ）を始める</a>
 
     <nav class="toc">
-"""
+"""]
 
     # --- グループ化された目次の生成 ---
     for group_name, chapters in grouped_chapters.items():
-        html_content += f'        <div class="toc-group">\n'
-        html_content += f'            <div class="toc-group-title">{group_name}</div>\n'
-        html_content += f'            <ul class="toc-links">\n'
+        TOC_GROUP_START.render_into(out, {'group_name': group_name})
         for s_num, label in chapters:
-            html_content += f'                <li><a href="#chapter-{s_num}">{label}</a></li>\n'
-        html_content += f'            </ul>\n'
-        html_content += f'        </div>\n'
+            TOC_LINK.render_into(out, {'s_num': s_num, 'label': label})
+        out.append(TOC_GROUP_END)
 
-    html_content += """    </nav>
-    <input type="text" id="searchInput" class="search-box" placeholder="単語・番号で検索..." onkeyup="filterList()">
+    out.append("""    </nav>
+    <input type="text" id="searchInput" class="search-box" placeholder="単語・番号で検索..." oninput="filterList()">
+    <div class="search-status" id="searchStatus" hidden></div>
+    <ul class="word-list" id="searchResults" hidden></ul>
     <ul class="word-list" id="wordList">
-"""
+""")
 
     current_chapter_start = -1
-    sorted_thresholds = sorted(CHAPTER_MAP.keys(), reverse=True)
-
-    for filename in files:
-        base_num = get_base_number(filename)
-        for t in sorted_thresholds:
-            if base_num >= t:
-                if t != current_chapter_start:
-                    html_content += f'        <li class="chapter-header" id="chapter-{t}">{CHAPTER_MAP[t]}</li>\n'
-                    current_chapter_start = t
-                break
-
-        word_id_full = filename.replace(".html", "")
-        display_name = re.sub(r'^[0-9-]+', '', word_id_full).replace("-", " ").strip()
-        parts = word_id_full.split("-")
-        is_sub = len(parts) > 1 and parts[1].isdigit()
+    chapter_index = build_chapter_index(CHAPTER_MAP)
+
+    rows = []
+    chapter_rows = defaultdict(list)
+    for word_data in sorted_words:
+        t = find_chapter(chapter_index, word_data.main_number)
+        row = get_index_row(word_data)
+        rows.append(row)
+        chapter_rows[t or 0].append(row)
+        if sharded:
+            continue
+
+        if t is not None and t != current_chapter_start:
+            CHAPTER_HEADER.render_into(out, {'t': t, 'title': CHAPTER_MAP[t]})
+            current_chapter_start = t
+
+        display_id, display_name, filename, meaning, is_sub = row
         item_class = "word-item sub-word" if is_sub else "word-item"
-        display_id = parts[0] + ("-" + parts[1] if is_sub else "")
 
-        # 日本語訳を取得
-        meaning = get_japanese_meaning(os.path.join(word_dir, filename))
+        WORD_ROW.render_into(out, {
+            'item_class': item_class,
+            'filename': filename,
+            'display_id': display_id,
+            'display_name': display_name,
+            'meaning': WORD_MEANING.render_into([], {'meaning': meaning}) if meaning else '',
+        })
 
-        html_content += f'        <li class="{item_class}"><a href="data/{filename}">'
-        html_content += f'<span class="word-id">{display_id}</span>'
-        html_content += f'<span class="word-name">{display_name}</span>'
-        if meaning:
-            html_content += f'<span class="word-meaning">{meaning}</span>'
-        html_content += f'</a></li>\n'
+    if sharded:
+        # 見出しと、読み込み前の高さを確保したプレースホルダーだけを出力
+        for t, shard_rows in chapter_rows.items():
+            if t:
+                CHAPTER_HEADER.render_into(out, {'t': t, 'title': CHAPTER_MAP[t]})
+            CHAPTER_SHARD.render_into(out, {'t': t, 'rows': len(shard_rows)})
+        write_chapter_shards(chapter_rows, changed_chapters=changed_chapters)
 
-    html_content += """    </ul>
+    out.append("""    </ul>
     <div class="loading-indicator" id="loadingIndicator">スクロールして読み込み...</div>
 </div>
 
 <button id="backToTop">↑</button>
 
 <script>
-    const wordList = document.getElementById('wordList');
-    const allItems = Array.from(wordList.children).filter(item => item.classList.contains('word-item'));
-    const backToTopBtn = document.getElementById('backToTop');
-    const margin = 1200;
-
-    function checkVisibleItems() {
-        const triggerLimit = window.innerHeight + window.scrollY + margin;
-        let hasHidden = false;
-        for (let item of allItems) {
-            if (item.classList.contains('hidden')) {
-                if (item.offsetTop < triggerLimit) {
-                    item.classList.remove('hidden');
-                } else {
-                    hasHidden = true;
-                    break;
-                }
-            }
-        }
-        document.getElementById('loadingIndicator').style.display = hasHidden ? 'block' : 'none';
-        backToTopBtn.style.display = window.scrollY > 300 ? 'flex' : 'none';
-    }
-
-    function initializeLazyLoad() {
-        allItems.forEach(item => item.classList.add('hidden'));
-        checkVisibleItems();
-    }
-
-    function loadChapterAndScroll(event, chapterId) {
-        event.preventDefault();
-        const chapterHeader = document.getElementById(chapterId);
-        if (!chapterHeader) return;
-        let nextEl = chapterHeader.nextElementSibling;
-        for (let i = 0; i < 40 && nextEl; i++) {
-            if (nextEl.classList.contains('word-item')) nextEl.classList.remove('hidden');
-            nextEl = nextEl.nextElementSibling;
-        }
-        chapterHeader.scrollIntoView({ behavior: 'smooth', block: 'start' });
-        setTimeout(checkVisibleItems, 100);
-    }
-
-    window.addEventListener('scroll', () => window.requestAnimationFrame(checkVisibleItems));
-    backToTopBtn.addEventListener('click', () => window.scrollTo({ top: 0, behavior: 'smooth' }));
-
-    document.addEventListener('DOMContentLoaded', () => {
-        document.querySelectorAll('.toc-links a').forEach(link => {
-            link.addEventListener('click', (e) => loadChapterAndScroll(e, link.getAttribute('href').substring(1)));
-        });
-        initializeLazyLoad();
-    });
-
-    function filterList() {
-        const filter = document.getElementById('searchInput').value.toLowerCase();
-        for (let item of wordList.getElementsByTagName('li')) {
-            if (item.classList.contains('chapter-header')) {
-                item.style.display = filter === "" ? "" : "none";
-                continue;
-            }
-            if (filter === "") {
-                item.classList.add('hidden');
-                item.style.display = "";
-            } else {
-                const text = item.textContent || item.innerText;
-                item.classList.remove('hidden');
-                item.style.display = text.toLowerCase().includes(filter) ? "" : "none";
-            }
-        }
-        if (filter === "") checkVisibleItems();
-    }
-</script>
+""")
+    out += [SHARDED_LIST_SCRIPT if sharded else INLINE_LIST_SCRIPT, SEARCH_SCRIPT, """</script>
+<script src="sw-register.js"></script>
 </body>
-</html>"""
+</html>"""]
 
-    with open("index.html", "w", encoding="utf-8") as f:
-        f.write(html_content)
+    # 出力片を連結せずにそのままファイルへ書き出す
+    write_parts("index.html", out)
+    with metrics.measure('search'):
+        write_search_index(rows, cache=cache)
     print(f"Update Complete: index.html has been rebuilt with grouped TOC and Exercise Link.")
 
 if __name__ == "__main__":
-    generate_index()
+    parser = argparse.ArgumentParser(description='単語データから index.html を生成')
+    parser.add_argument('--sharded', action='store_true',
+                        help='一覧をチャプターごとの JSON（index_data/）に分け、表示時に読み込む')
+    args = parser.parse_args()
+    generate_index(sharded=args.sharded)
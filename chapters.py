@@ -0,0 +1,28 @@
+from bisect import bisect_right
+
+import config
+from models import parse_number
+
+
+def build_chapter_index(chapter_map=None):
+    """CHAPTER_MAP の開始番号を昇順に並べたタプル（二分探索用）を作る"""
+    if chapter_map is None:
+        chapter_map = config.CHAPTER_MAP
+    return tuple(sorted(chapter_map))
+
+
+def find_chapter(chapter_index, number):
+    """番号（422 / "422-2" など）が属するチャプターの開始番号を二分探索で返す。
+    どの範囲にも入らない（最初の開始番号より小さい）場合は None"""
+    main_num = number if isinstance(number, int) else parse_number(number)[0]
+    position = bisect_right(chapter_index, main_num)
+    return chapter_index[position - 1] if position else None
+
+
+def find_changed_chapters(chapter_index, previous_words, sorted_words):
+    """前回と今回の単語リストを内容ハッシュで比べ、追加・変更・削除のあったチャプターの集合を返す
+    （範囲外の番号は 0 として数える）"""
+    previous = {w.number: w.digest for w in previous_words}
+    current = {w.number: w.digest for w in sorted_words}
+    changed = {number for number in previous.keys() | current.keys() if previous.get(number) != current.get(number)}
+    return {find_chapter(chapter_index, number) or 0 for number in changed}
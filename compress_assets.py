@@ -0,0 +1,136 @@
+import argparse
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from pathlib import Path
+
+from fileutil import write_if_changed
+
+try:
+    import brotli
+except ImportError:  # brotli は任意（無ければ .gz だけ作る）
+    brotli = None
+
+# 事前圧縮した成果物の一覧（サイズとハッシュ）
+ASSET_MANIFEST_PATH = Path('asset-manifest.json')
+ASSET_MANIFEST_VERSION = 1
+
+# 圧縮対象にする生成物・配信ファイル
+ASSET_PATTERNS = [
+    'index.html',
+    'exercise.html',
+    'sw.js',
+    'sw-register.js',
+    'data/*.html',
+    'assets/*.css',
+    'search/*.json',
+    'index_data/*.json',
+    'exercise_data/*.json',
+    'vocabulary_data*.json',
+]
+
+
+def list_assets():
+    """圧縮対象のファイルを列挙（重複なし・パス順）"""
+    paths = set()
+    for pattern in ASSET_PATTERNS:
+        paths.update(Path(p).as_posix() for p in glob(pattern))
+    return sorted(paths)
+
+
+def load_asset_manifest():
+    """前回の asset-manifest.json を読み込む"""
+    try:
+        with open(ASSET_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != ASSET_MANIFEST_VERSION:
+        return {}
+    return manifest.get('files', {})
+
+
+def compress_file(path):
+    """ワーカー: 1ファイルを .gz / .br に圧縮し、サイズを返す"""
+    raw = Path(path).read_bytes()
+    entry = {}
+    # mtime=0 にして、同じ入力からは常に同じ .gz ができるようにする
+    gz = gzip.compress(raw, compresslevel=9, mtime=0)
+    write_if_changed(path + '.gz', gz)
+    entry['gzip'] = len(gz)
+    if brotli is not None:
+        br = brotli.compress(raw, quality=11)
+        write_if_changed(path + '.br', br)
+        entry['br'] = len(br)
+    return path, entry
+
+
+def is_up_to_date(path, previous, digest):
+    """前回と内容が同じで、圧縮ファイルも揃っていれば True"""
+    if not previous or previous.get('sha256') != digest:
+        return False
+    if not os.path.exists(path + '.gz'):
+        return False
+    if brotli is not None and ('br' not in previous or not os.path.exists(path + '.br')):
+        return False
+    return True
+
+
+def remove_orphans(previous_files, current_files):
+    """元ファイルが無くなった .gz / .br を削除"""
+    removed = 0
+    for path in set(previous_files) - set(current_files):
+        for suffix in ('.gz', '.br'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+                removed += 1
+    return removed
+
+
+def compress_assets(jobs=None):
+    """すべての成果物の .gz / .br を作り、asset-manifest.json を更新する。
+    内容ハッシュが前回と同じファイルは圧縮し直さない"""
+    if brotli is None:
+        print("⚠ brotli モジュールが無いため .br は生成しません（pip install brotli）")
+
+    previous = load_asset_manifest()
+    files = {}
+    pending = []
+    for path in list_assets():
+        raw = Path(path).read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        files[path] = {'size': len(raw), 'sha256': digest}
+        if is_up_to_date(path, previous.get(path), digest):
+            files[path].update({k: v for k, v in previous[path].items() if k in ('gzip', 'br')})
+        else:
+            pending.append(path)
+
+    # 圧縮はCPUを使うのでコアに分散する
+    if pending:
+        workers = jobs or os.cpu_count() or 1
+        # build.py ではスレッドで並行する他のステージがあるので spawn で起動する（generate_vocab.run_page_tasks と同じ）
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            chunksize = max(1, len(pending) // (workers * 4))
+            for path, entry in executor.map(compress_file, pending, chunksize=chunksize):
+                files[path].update(entry)
+
+    removed = remove_orphans(previous, files)
+    manifest = {'version': ASSET_MANIFEST_VERSION, 'files': files}
+    write_if_changed(ASSET_MANIFEST_PATH, json.dumps(manifest, ensure_ascii=False, indent=1) + '\n')
+
+    total = sum(entry['size'] for entry in files.values())
+    total_gz = sum(entry['gzip'] for entry in files.values())
+    print(f"🗜 事前圧縮: {len(files)} ファイル（圧縮 {len(pending)} / 変更なし {len(files) - len(pending)} / 削除 {removed}）")
+    print(f"   合計 {total:,} bytes → gzip {total_gz:,} bytes")
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='生成物の .gz / .br を事前に作成し asset-manifest.json を書き出す')
+    parser.add_argument('--jobs', '-j', type=int, default=0, help='圧縮に使うワーカープロセス数（0 でCPUコア数）')
+    args = parser.parse_args()
+    compress_assets(jobs=args.jobs or None)
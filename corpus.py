@@ -0,0 +1,280 @@
+import gc
+import hashlib
+import heapq
+import json
+import os
+import pickle
+import re
+from glob import glob
+from pathlib import Path
+
+import metrics
+import models
+from models import Word, parse_number
+
+# vocabulary_data*.json の解析結果キャッシュ（ファイルごとに size / mtime / ハッシュで管理）
+CACHE_PATH = Path('.corpus-cache.pickle')
+CACHE_VERSION = 2
+# キャッシュには models.Word を保存するので、models.py の内容が変わったら（解析・既定値・__slots__）作り直す
+MODELS_HASH = hashlib.sha256(Path(models.__file__).read_bytes()).hexdigest()
+
+
+class CorpusError(RuntimeError):
+    """読み込めなかった vocabulary_data*.json がある（その単語のページを消さないようビルドを止める）"""
+
+    def __init__(self, failed):
+        self.failed = failed
+        details = ''.join(f"\n  - {json_file}: {error}" for json_file, error in failed)
+        super().__init__(f"{len(failed)} 件の JSON ファイルを読み込めませんでした{details}")
+
+
+def list_vocabulary_files():
+    """vocabulary_data.json → vocabulary_data_N.json（数字順）のファイル名リストを取得"""
+    json_files = []
+
+    # まず vocabulary_data.json を確認
+    if os.path.exists('vocabulary_data.json'):
+        json_files.append('vocabulary_data.json')
+
+    # 次に vocabulary_data_N.json を取得（数字順にソート）
+    numbered_files = sorted(glob('vocabulary_data_*.json'),
+                            key=lambda x: int(re.search(r'_(\d+)\.json', x).group(1)))
+    json_files.extend(numbered_files)
+    return json_files
+
+
+def sort_words_by_number(words):
+    """単語をメイン→サブの順番でソート"""
+    return sorted(words, key=lambda w: w.key)
+
+
+def load_cache():
+    """キャッシュを読み込む（壊れている・バージョン違いなら空）"""
+    # 大量の小さな dict を復元する間はGCを止める（復元時間が約4割短くなる）
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(CACHE_PATH, 'rb') as f:
+            cache = pickle.load(f)
+            metrics.add_io(bytes_read=f.tell(), files_read=1)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError, ValueError):
+        # TypeError / ValueError: models.Word のコンストラクタが変わって復元できない
+        return {'version': CACHE_VERSION, 'models': MODELS_HASH, 'files': {}}
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION or cache.get('models') != MODELS_HASH:
+        return {'version': CACHE_VERSION, 'models': MODELS_HASH, 'files': {}}
+    return cache
+
+
+def save_cache(cache):
+    """キャッシュを書き込む（途中で落ちても壊れないよう一時ファイル経由）"""
+    tmp_path = CACHE_PATH.with_name(CACHE_PATH.name + '.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            metrics.add_io(bytes_written=f.tell(), files_written=1)
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError as e:
+        print(f"    ⚠ キャッシュを保存できませんでした: {e}")
+
+
+def load_file_entry(json_file, cached):
+    """1ファイル分のエントリを返す。size/mtime が同じならキャッシュ、内容ハッシュが同じでも再利用"""
+    stat = os.stat(json_file)
+    if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+        return cached, 'cache'
+
+    with open(json_file, 'rb') as f:
+        raw = f.read()
+    metrics.add_io(bytes_read=len(raw), files_read=1)
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached and cached['sha256'] == digest:
+        # 内容は同じ（touch されただけ）なので解析し直さない
+        return dict(cached, size=stat.st_size, mtime_ns=stat.st_mtime_ns), 'cache'
+
+    data = json.loads(raw.decode('utf-8'))
+    entry = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest,
+        'words': [Word.from_dict(d) for d in data.get('words', [])],
+    }
+    return entry, 'parsed'
+
+
+def load_corpus(verbose=True):
+    """すべての vocabulary_data*.json を読み込む（変更のあったファイルだけ解析し直す）。
+    戻り値は {'files': [ファイル名...], 'words': 統合リスト, 'sorted_words': 番号順リスト,
+    'failed': [(読み込めなかったファイル名, エラー)...]}"""
+    json_files = list_vocabulary_files()
+    if not json_files:
+        print("エラー: vocabulary_data.json または vocabulary_data_*.json が見つかりません")
+        return {'files': [], 'words': [], 'sorted_words': [], 'failed': []}
+
+    with metrics.measure('cache'):
+        cache = load_cache()
+    cached_files = cache['files']
+    files = {}
+    failed = []
+    changed = set(cached_files) - set(json_files)
+
+    if verbose:
+        print(f"\n読み込むJSONファイル: {len(json_files)}件")
+    for json_file in json_files:
+        if verbose:
+            print(f"  - {json_file}")
+        try:
+            entry, source = load_file_entry(json_file, cached_files.get(json_file))
+        except Exception as e:
+            print(f"    ⚠ エラー: {json_file}: {e}")
+            failed.append((json_file, e))
+            changed.add(json_file)
+            continue
+        if entry is not cached_files.get(json_file):
+            changed.add(json_file)
+        files[json_file] = entry
+        if verbose:
+            suffix = "（キャッシュ）" if source == 'cache' else ""
+            print(f"    → {len(entry['words'])}個の単語を読み込み{suffix}")
+
+    all_words = [w for json_file in files for w in files[json_file]['words']]
+
+    # 番号順リストも同じキャッシュに保存（pickle が同一オブジェクトを共有するのでサイズは増えない）
+    sorted_key = tuple(files[json_file]['sha256'] for json_file in files)
+    if not changed and cache.get('sorted_key') == sorted_key:
+        sorted_words = cache['sorted_words']
+    else:
+        with metrics.measure('sort'):
+            sorted_words = sort_words_by_number(all_words)
+        save_cache({
+            'version': CACHE_VERSION,
+            'models': MODELS_HASH,
+            'files': files,
+            'sorted_key': sorted_key,
+            'sorted_words': sorted_words,
+        })
+
+    if verbose:
+        print(f"\n合計: {len(all_words)}個の単語を統合")
+    return {'files': list(files), 'words': all_words, 'sorted_words': sorted_words, 'failed': failed}
+
+
+def load_checked_corpus(verbose=True):
+    """load_corpus と同じ。読み込めなかったファイルが1つでもあれば CorpusError"""
+    result = load_corpus(verbose)
+    if result['failed']:
+        raise CorpusError(result['failed'])
+    return result
+
+
+def load_all_words(verbose=True):
+    """ファイル順に統合した単語リスト"""
+    return load_checked_corpus(verbose)['words']
+
+
+def load_sorted_words(verbose=True):
+    """メイン→サブの番号順にソート済みの単語リスト"""
+    return load_checked_corpus(verbose)['sorted_words']
+
+
+# ---- ストリーミング読み込み（コーパス全体をメモリに載せない） ----
+# 各ファイルを少しずつ読んで1語ずつ取り出し、番号とファイル内の位置だけを覚えておく。
+# 番号順に並べた位置の列をファイルごとの「ソート済みラン」として k-way マージし、
+# 本体は出力する直前にその位置から読み直す。
+STREAM_CHUNK_SIZE = 1 << 16
+# 同時に開いておくファイル数の上限（ファイルが数千あっても fd を使い切らないように）
+STREAM_OPEN_FILES = 16
+WORDS_ARRAY_RE = re.compile(r'"words"\s*:\s*\[')
+
+
+def iter_file_records(json_file, chunk_size=STREAM_CHUNK_SIZE):
+    """{"words": [...]} の配列要素を1つずつ (バイト位置, バイト長, dict) で返す。
+    ファイルは chunk_size ずつしか読まない"""
+    decoder = json.JSONDecoder()
+    # newline='' で改行を変換させない（バイト位置を正しく数えるため）
+    with open(json_file, 'r', encoding='utf-8', newline='') as f:
+        buf = ''
+        match = None
+        while match is None:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            buf += chunk
+            match = WORDS_ARRAY_RE.search(buf)
+        byte_pos = len(buf[:match.end()].encode('utf-8'))
+        buf = buf[match.end():]
+        pos = 0
+        eof = False
+        while True:
+            # 要素間の空白とカンマを読み飛ばす（ASCII なので1文字1バイト）
+            start = pos
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            byte_pos += pos - start
+            if pos < len(buf) and buf[pos] == ']':
+                return
+            try:
+                if pos == len(buf):
+                    raise ValueError
+                record, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                # 要素が途中で切れているので続きを読む
+                if eof:
+                    raise ValueError(f"{json_file}: words 配列が閉じていません")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+            size = len(buf[pos:end].encode('utf-8'))
+            yield byte_pos, size, record
+            byte_pos += size
+            pos = end
+
+
+def build_sorted_run(file_id, json_file):
+    """1ファイル分のソート済みラン [(番号キー, ファイルID, バイト位置, バイト長), ...] を作る"""
+    run = [(parse_number(record['number']), file_id, offset, size)
+           for offset, size, record in iter_file_records(json_file)]
+    run.sort()
+    return run
+
+
+def iter_run_words(json_files, runs):
+    """各ファイルを1回だけ読み、ソート済みランを runs に追加しながら単語（models.Word）をファイル順に返す。
+    見出し語の索引などを同じ読み込みで作り、できた runs を iter_sorted_words に渡して使い回すため"""
+    for file_id, json_file in enumerate(json_files):
+        run = []
+        for offset, size, record in iter_file_records(json_file):
+            word_data = Word.from_dict(record)
+            run.append((word_data.key, file_id, offset, size))
+            yield word_data
+        run.sort()
+        runs.append(run)
+
+
+def iter_sorted_words(json_files=None, runs=None):
+    """全ファイルの単語を番号順に1語ずつ返すジェネレーター（heapq.merge による k-way マージ）。
+    メモリに残るのは各語の番号と位置だけで、単語データは1語分ずつしか保持しない。
+    runs（iter_run_words で作ったもの）を渡せば、位置を集めるための読み込みを省く"""
+    if json_files is None:
+        json_files = list_vocabulary_files()
+    if runs is None:
+        runs = [build_sorted_run(file_id, json_file) for file_id, json_file in enumerate(json_files)]
+    handles = {}
+    try:
+        for _key, file_id, offset, size in heapq.merge(*runs):
+            f = handles.pop(file_id, None)
+            if f is None:
+                if len(handles) >= STREAM_OPEN_FILES:
+                    # いちばん長く使っていないファイルを閉じる（dict は挿入順）
+                    handles.pop(next(iter(handles))).close()
+                f = open(json_files[file_id], 'rb')
+            handles[file_id] = f
+            f.seek(offset)
+            yield Word.from_dict(json.loads(f.read(size)))
+    finally:
+        for f in handles.values():
+            f.close()
@@ -0,0 +1,78 @@
+import argparse
+import sys
+
+from corpus import load_sorted_words
+from models import get_filename, normalize_headword
+
+# 類義語・反意語・関連語から単語ページへのリンクを自動で解決する。
+# 見出し語を正規化したキー → ページのファイル名 の辞書を一度作り、各参照は辞書を1回引くだけで解決する。
+
+REF_FIELDS = ('synonyms', 'antonyms', 'related')
+
+
+def build_headword_index(sorted_words):
+    """(正規化した見出し語 → ファイル名, 全ページのファイル名の集合) を作る。
+    同じ見出し語が複数あるときはメイン単語を優先し、その中では番号の小さいものを使う"""
+    index = {}
+    ranks = {}
+    filenames = set()
+    for word_data in sorted_words:
+        filename = get_filename(word_data)
+        filenames.add(filename)
+        key = normalize_headword(word_data.word)
+        rank = (word_data.is_sub, word_data.key)
+        if key not in ranks or rank < ranks[key]:
+            ranks[key] = rank
+            index[key] = filename
+    return index, filenames
+
+
+def resolve_ref(ref, own_filename, crossref):
+    """1項目のリンク先を返す。手書きの link が実在すればそれを、なければ見出し語から引く（自分自身へはリンクしない）"""
+    index, filenames = crossref
+    if ref.link and ref.link in filenames:
+        return ref.link
+    link = index.get(normalize_headword(ref.word))
+    return link if link != own_filename else None
+
+
+def resolve_word_links(word_data, crossref):
+    """synonyms / antonyms / related それぞれのリンク先のタプル（リンクなしは None）"""
+    own_filename = get_filename(word_data)
+    return tuple(tuple(resolve_ref(ref, own_filename, crossref) for ref in getattr(word_data, field))
+                 for field in REF_FIELDS)
+
+
+def find_dangling_links(sorted_words, crossref):
+    """手書きの link のうち、生成されるページに存在しないものを (番号, 単語, 項目, link) で列挙"""
+    _index, filenames = crossref
+    dangling = []
+    for word_data in sorted_words:
+        for field in REF_FIELDS:
+            for ref in getattr(word_data, field):
+                if ref.link and ref.link not in filenames:
+                    dangling.append((word_data.number, word_data.word, field, ref.link))
+    return dangling
+
+
+def print_dangling_links(dangling, limit=20):
+    if not dangling:
+        return
+    print(f"⚠ リンク切れ（手書きの link）: {len(dangling)} 件")
+    for number, word, field, link in dangling[:limit]:
+        print(f"   {number} {word} [{field}] → {link}")
+    if len(dangling) > limit:
+        print(f"   ...ほか {len(dangling) - limit} 件")
+
+
+if __name__ == '__main__':
+    argparse.ArgumentParser(description='類義語・反意語・関連語のリンク解決状況とリンク切れを表示').parse_args()
+    sorted_words = load_sorted_words(verbose=False)
+    crossref = build_headword_index(sorted_words)
+    links = [link for w in sorted_words for field_links in resolve_word_links(w, crossref) for link in field_links]
+    print(f"見出し語 {len(crossref[0])} 件 / 参照 {len(links)} 件のうちリンク {sum(1 for link in links if link)} 件")
+    dangling = find_dangling_links(sorted_words, crossref)
+    print_dangling_links(dangling)
+    if dangling:
+        sys.exit(1)
+    print("✓ リンク切れはありません")
@@ -0,0 +1,173 @@
+import argparse
+import json
+import mmap
+import struct
+from pathlib import Path
+
+from fileutil import write_if_changed
+from models import normalize_headword, parse_number
+
+# 端末やエディタから1語ずつ引くための、単一のバイナリ辞書ファイル dictionary.bin。
+# JSON をすべて読み込まずに、mmap した上で二分探索して必要なレコードだけを読む。
+#
+#   ヘッダー
+#   見出し語表  （正規化した見出し語の UTF-8 バイト列の昇順。固定長なので i 番目を直接読める）
+#   番号表      （(メイン番号, サブ番号) の昇順。固定長）
+#   見出し語の文字列領域
+#   レコード領域（4バイトの長さ + 1語分の JSON）
+
+DICTIONARY_PATH = Path('dictionary.bin')
+MAGIC = b'VOCABDIC'
+FORMAT_VERSION = 1
+
+# マジック, 版, 予約, レコード数, 見出し語表の件数, 番号表の件数,
+# 見出し語表・番号表・文字列領域・レコード領域の開始位置
+HEADER = struct.Struct('<8sHHIIIQQQQ')
+# 文字列領域内の位置, 長さ, サブ単語か, レコードの位置
+HEADWORD_ENTRY = struct.Struct('<IHHQ')
+# メイン番号, サブ番号, レコードの位置
+NUMBER_ENTRY = struct.Struct('<IIQ')
+RECORD_LENGTH = struct.Struct('<I')
+
+
+# ==========================================
+# 1. 書き出し
+# ==========================================
+def build_dictionary(sorted_words):
+    """番号順の単語モデルのリストから dictionary.bin の内容（bytes）を作る"""
+    records = bytearray()
+    record_offsets = []
+    for w in sorted_words:
+        payload = json.dumps(w.to_dict(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        record_offsets.append(len(records))
+        records += RECORD_LENGTH.pack(len(payload)) + payload
+
+    # 同じ見出し語はメイン単語・番号の小さい順に並べる
+    headwords = sorted(
+        ((normalize_headword(w.word).encode('utf-8'), w.is_sub, w.key, i) for i, w in enumerate(sorted_words)))
+    keys = bytearray()
+    key_offsets = {}
+    for key, _is_sub, _key, _i in headwords:
+        if key not in key_offsets:
+            key_offsets[key] = len(keys)
+            keys += key
+
+    headword_table_offset = HEADER.size
+    number_table_offset = headword_table_offset + HEADWORD_ENTRY.size * len(headwords)
+    keys_offset = number_table_offset + NUMBER_ENTRY.size * len(sorted_words)
+    records_offset = keys_offset + len(keys)
+
+    out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(sorted_words), len(headwords), len(sorted_words),
+                                headword_table_offset, number_table_offset, keys_offset, records_offset))
+    for key, is_sub, _key, i in headwords:
+        out += HEADWORD_ENTRY.pack(key_offsets[key], len(key), is_sub, records_offset + record_offsets[i])
+    for w, offset in zip(sorted_words, record_offsets):
+        out += NUMBER_ENTRY.pack(w.key[0], w.key[1], records_offset + offset)
+    out += keys
+    out += records
+    return bytes(out)
+
+
+def write_dictionary(sorted_words, path=DICTIONARY_PATH):
+    """dictionary.bin を書き出す（内容が同じなら触らない）"""
+    data = build_dictionary(sorted_words)
+    changed = write_if_changed(path, data)
+    print(f"📘 辞書ファイル: {path}（{len(sorted_words)} 語, {len(data):,} bytes{'' if changed else '、変更なし'}）")
+    return path
+
+
+# ==========================================
+# 2. 読み込み（mmap + 二分探索）
+# ==========================================
+class Dictionary:
+    """dictionary.bin を mmap して引く。with 文で使う"""
+
+    def __init__(self, path=DICTIONARY_PATH):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path}: 辞書ファイルではありません")
+        (magic, version, _reserved, self.record_count, self.headword_count, self.number_count,
+         self.headword_table, self.number_table, self.keys, self.records) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path}: 形式が違います（python build.py dictionary で作り直してください）")
+
+    def close(self):
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read_record(self, offset):
+        (length,) = RECORD_LENGTH.unpack_from(self.mm, offset)
+        return json.loads(self.mm[offset + RECORD_LENGTH.size:offset + RECORD_LENGTH.size + length])
+
+    def _headword(self, i):
+        key_offset, key_length, _is_sub, record = HEADWORD_ENTRY.unpack_from(
+            self.mm, self.headword_table + i * HEADWORD_ENTRY.size)
+        start = self.keys + key_offset
+        return self.mm[start:start + key_length], record
+
+    def _bisect_headword(self, key):
+        """key 以上になる最初の見出し語表の位置"""
+        lo, hi = 0, self.headword_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._headword(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find_word(self, headword):
+        """見出し語が一致するレコード（同じ見出し語が複数あればメイン単語・番号順にすべて）"""
+        key = normalize_headword(headword).encode('utf-8')
+        results = []
+        i = self._bisect_headword(key)
+        while i < self.headword_count:
+            found, record = self._headword(i)
+            if found != key:
+                break
+            results.append(self.read_record(record))
+            i += 1
+        return results
+
+    def find_prefix(self, prefix, limit=20):
+        """見出し語が prefix で始まるレコードを見出し語順に limit 件まで（補完用）"""
+        key = normalize_headword(prefix).encode('utf-8')
+        results = []
+        i = self._bisect_headword(key)
+        while i < self.headword_count and len(results) < limit:
+            found, record = self._headword(i)
+            if not found.startswith(key):
+                break
+            results.append(self.read_record(record))
+            i += 1
+        return results
+
+    def find_number(self, number):
+        """番号（422 / "422-2"）のレコード。無ければ None"""
+        target = parse_number(number)
+        lo, hi = 0, self.number_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            main_num, sub_num, record = NUMBER_ENTRY.unpack_from(self.mm, self.number_table + mid * NUMBER_ENTRY.size)
+            if (main_num, sub_num) < target:
+                lo = mid + 1
+            elif (main_num, sub_num) > target:
+                hi = mid
+            else:
+                return self.read_record(record)
+        return None
+
+
+if __name__ == '__main__':
+    argparse.ArgumentParser(description='vocabulary_data*.json から dictionary.bin を作成').parse_args()
+    # lookup.py の起動を軽くするため、コーパスの読み込みはここでだけ import する
+    from corpus import load_sorted_words
+    write_dictionary(load_sorted_words(verbose=False))
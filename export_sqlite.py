@@ -0,0 +1,329 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+import config
+from chapters import build_chapter_index, find_chapter
+from corpus import iter_file_records, list_vocabulary_files
+from models import Word, normalize_headword, split_pos
+from search_index import split_meaning
+
+# 分析用に単語データを SQLite（vocabulary.sqlite3）へ書き出す。
+# 変更のあった vocabulary_data*.json の単語だけを入れ替え、全体を1トランザクションで更新する。
+#
+# 例: LEAP 1001〜1500 の動詞のうち、例文に economy を含むもの
+#   SELECT DISTINCT w.number, w.word
+#   FROM words w
+#   JOIN chapters c ON c.id = w.chapter_id AND c.group_name = 'LEAP'
+#   JOIN word_pos p ON p.word_id = w.id AND p.pos = '動詞'
+#   JOIN examples e ON e.word_id = w.id
+#   JOIN examples_fts f ON f.rowid = e.id
+#   WHERE w.main_number BETWEEN 11001 AND 11500 AND examples_fts MATCH 'economy';
+#
+# trigram トークナイザーの MATCH は3文字以上の検索語で使う（「首都」のような2文字は senses.text LIKE '%首都%'）
+
+SQLITE_PATH = Path('vocabulary.sqlite3')
+SCHEMA_VERSION = 1
+REF_KINDS = {'synonyms': 'synonym', 'antonyms': 'antonym', 'related': 'related'}
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE source_files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    sha256 TEXT NOT NULL,
+    word_count INTEGER NOT NULL
+);
+CREATE TABLE chapters (
+    id INTEGER PRIMARY KEY,          -- CHAPTER_MAP の開始番号
+    position INTEGER NOT NULL,       -- 教材の順（0 始まり）
+    group_name TEXT NOT NULL,        -- 【】内の教材名（例: LEAP）
+    title TEXT NOT NULL,
+    first_number INTEGER NOT NULL,
+    last_number INTEGER              -- 最後の章は NULL
+);
+CREATE TABLE words (
+    id INTEGER PRIMARY KEY,
+    source_file_id INTEGER NOT NULL REFERENCES source_files(id) ON DELETE CASCADE,
+    number TEXT NOT NULL,
+    main_number INTEGER NOT NULL,
+    sub_number INTEGER NOT NULL,
+    is_sub INTEGER NOT NULL,
+    chapter_id INTEGER REFERENCES chapters(id),
+    word TEXT NOT NULL,
+    headword TEXT NOT NULL,          -- 正規化した見出し語（word_refs.headword と結合する）
+    pos TEXT NOT NULL,
+    meaning TEXT NOT NULL,
+    nuance TEXT NOT NULL,
+    etymology TEXT,
+    digest TEXT NOT NULL
+);
+CREATE TABLE word_pos (
+    word_id INTEGER NOT NULL REFERENCES words(id) ON DELETE CASCADE,
+    pos TEXT NOT NULL,               -- 他動詞・自動詞は「動詞」にまとめる
+    detail TEXT NOT NULL             -- 元の表記
+);
+CREATE TABLE senses (
+    id INTEGER PRIMARY KEY,
+    word_id INTEGER NOT NULL REFERENCES words(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    folded TEXT NOT NULL             -- 記号除去・NFKC・ひらがな化したもの
+);
+CREATE TABLE examples (
+    id INTEGER PRIMARY KEY,
+    word_id INTEGER NOT NULL REFERENCES words(id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    en TEXT NOT NULL,
+    ja TEXT NOT NULL,
+    highlight TEXT NOT NULL
+);
+CREATE TABLE word_refs (
+    word_id INTEGER NOT NULL REFERENCES words(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,              -- synonym / antonym / related
+    position INTEGER NOT NULL,
+    word TEXT NOT NULL,
+    headword TEXT NOT NULL,
+    trans TEXT NOT NULL,
+    link TEXT
+);
+CREATE INDEX idx_words_number ON words(main_number, sub_number);
+CREATE INDEX idx_words_chapter ON words(chapter_id, main_number);
+CREATE INDEX idx_words_pos ON words(pos);
+CREATE INDEX idx_words_headword ON words(headword);
+CREATE INDEX idx_words_source ON words(source_file_id);
+CREATE INDEX idx_word_pos ON word_pos(pos, word_id);
+CREATE INDEX idx_word_pos_word ON word_pos(word_id);
+CREATE INDEX idx_senses_word ON senses(word_id);
+CREATE INDEX idx_examples_word ON examples(word_id);
+CREATE INDEX idx_refs_word ON word_refs(word_id);
+CREATE INDEX idx_refs_headword ON word_refs(headword, kind);
+"""
+
+# 全文検索（英語の例文・日本語の意味）。外部コンテンツ表をトリガーで同期するので、単語の入れ替えにも追従する
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE examples_fts USING fts5(en, ja, content='examples', content_rowid='id', tokenize='{tokenizer}');
+CREATE VIRTUAL TABLE senses_fts USING fts5(text, folded, content='senses', content_rowid='id', tokenize='{tokenizer}');
+CREATE TRIGGER examples_ai AFTER INSERT ON examples BEGIN
+    INSERT INTO examples_fts(rowid, en, ja) VALUES (new.id, new.en, new.ja);
+END;
+CREATE TRIGGER examples_ad AFTER DELETE ON examples BEGIN
+    INSERT INTO examples_fts(examples_fts, rowid, en, ja) VALUES ('delete', old.id, old.en, old.ja);
+END;
+CREATE TRIGGER senses_ai AFTER INSERT ON senses BEGIN
+    INSERT INTO senses_fts(rowid, text, folded) VALUES (new.id, new.text, new.folded);
+END;
+CREATE TRIGGER senses_ad AFTER DELETE ON senses BEGIN
+    INSERT INTO senses_fts(senses_fts, rowid, text, folded) VALUES ('delete', old.id, old.text, old.folded);
+END;
+"""
+
+
+# ==========================================
+# 1. スキーマ
+# ==========================================
+def choose_tokenizer(conn):
+    """FTS5 のトークナイザー。日本語も部分一致で引ける trigram（SQLite 3.34 以降）を優先し、
+    無ければ unicode61、FTS5 自体が無ければ None"""
+    for tokenizer in ('trigram', 'unicode61'):
+        try:
+            conn.execute(f"CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize='{tokenizer}')")
+        except sqlite3.OperationalError:
+            continue
+        conn.execute("DROP TABLE temp.fts_probe")
+        return tokenizer
+    return None
+
+
+def execute_script(conn, script):
+    """複数の SQL 文を順に実行する（executescript は実行前に COMMIT してしまうため使わない）"""
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ''
+
+
+def get_meta(conn, key):
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def drop_schema(conn):
+    """既存の表をすべて消す。一覧を先に読み切ってから、トリガー → FTS5 の仮想表 → 通常の表の順に消す
+    （FTS5 の内部表 *_fts_data などは仮想表と一緒に消える）"""
+    objects = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite\\_%' ESCAPE '\\'").fetchall()
+    triggers = [name for kind, name, _sql in objects if kind == 'trigger']
+    virtual_tables = [name for kind, name, sql in objects
+                      if kind == 'table' and sql and sql.upper().startswith('CREATE VIRTUAL TABLE')]
+    shadow_prefixes = tuple(f"{name}_" for name in virtual_tables)
+    tables = [name for kind, name, _sql in objects
+              if kind == 'table' and name not in virtual_tables and not name.startswith(shadow_prefixes)]
+    for name in triggers:
+        conn.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+    for name in virtual_tables + tables:
+        conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+
+
+def create_schema(conn):
+    """表を作り直す（スキーマの版が違うときや --force のとき）"""
+    drop_schema(conn)
+    execute_script(conn, SCHEMA)
+    tokenizer = choose_tokenizer(conn)
+    if tokenizer:
+        execute_script(conn, FTS_SCHEMA.format(tokenizer=tokenizer))
+    else:
+        print("⚠ この SQLite には FTS5 が無いため、全文検索の表は作りません")
+    conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                     [('schema_version', str(SCHEMA_VERSION)), ('fts_tokenizer', tokenizer or '')])
+    return tokenizer
+
+
+# ==========================================
+# 2. 行データへの変換
+# ==========================================
+def get_chapter_digest():
+    return hashlib.sha256(json.dumps(sorted(config.CHAPTER_MAP.items()), ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def chapter_rows():
+    """CHAPTER_MAP から chapters 表の行を作る"""
+    starts = sorted(config.CHAPTER_MAP)
+    rows = []
+    for position, start in enumerate(starts):
+        title = config.CHAPTER_MAP[start]
+        group_name = title[1:title.index('】')] if title.startswith('【') and '】' in title else 'その他'
+        last_number = starts[position + 1] - 1 if position + 1 < len(starts) else None
+        rows.append((start, position, group_name, title, start, last_number))
+    return rows
+
+
+class RowBuffer:
+    """表ごとの行をためておき、最後に executemany でまとめて入れる"""
+
+    def __init__(self, next_word_id, next_sense_id, next_example_id):
+        self.next_word_id = next_word_id
+        self.next_sense_id = next_sense_id
+        self.next_example_id = next_example_id
+        self.words = []
+        self.word_pos = []
+        self.senses = []
+        self.examples = []
+        self.word_refs = []
+
+    def add_word(self, w, source_file_id, chapter_index):
+        word_id = self.next_word_id
+        self.next_word_id += 1
+        self.words.append((word_id, source_file_id, str(w.number), w.key[0], w.key[1], int(w.is_sub),
+                           find_chapter(chapter_index, w.key[0]), w.word, normalize_headword(w.word), w.pos, w.meaning,
+                           w.nuance, w.etymology, w.digest))
+        self.word_pos.extend((word_id, pos, detail) for pos, detail in split_pos(w.pos))
+        for position, (text, folded) in enumerate(split_meaning(w.meaning)):
+            self.senses.append((self.next_sense_id, word_id, position, text, folded))
+            self.next_sense_id += 1
+        position = 0
+        for section in w.sections:
+            for ex in section.examples:
+                self.examples.append((self.next_example_id, word_id, section.title, position, ex.en, ex.ja, ex.highlight))
+                self.next_example_id += 1
+                position += 1
+        for field, kind in REF_KINDS.items():
+            for position, ref in enumerate(getattr(w, field)):
+                self.word_refs.append((word_id, kind, position, ref.word, normalize_headword(ref.word), ref.trans, ref.link))
+
+    def flush(self, conn):
+        conn.executemany("INSERT INTO words VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self.words)
+        conn.executemany("INSERT INTO word_pos VALUES (?, ?, ?)", self.word_pos)
+        conn.executemany("INSERT INTO senses VALUES (?, ?, ?, ?, ?)", self.senses)
+        conn.executemany("INSERT INTO examples VALUES (?, ?, ?, ?, ?, ?, ?)", self.examples)
+        conn.executemany("INSERT INTO word_refs VALUES (?, ?, ?, ?, ?, ?, ?)", self.word_refs)
+
+
+# ==========================================
+# 3. 書き出し（変更のあったファイルだけ入れ替え）
+# ==========================================
+def next_id(conn, table):
+    return conn.execute(f"SELECT coalesce(max(id), 0) + 1 FROM {table}").fetchone()[0]
+
+
+def export_sqlite(json_files=None, path=SQLITE_PATH, force=False):
+    """vocabulary_data*.json を SQLite に書き出す。内容ハッシュが前回と同じファイルは読まない。
+    (更新したファイル数, 全ファイル数) を返す"""
+    if json_files is None:
+        json_files = list_vocabulary_files()
+    start_time = time.perf_counter()
+    conn = sqlite3.connect(path)
+    try:
+        # 書き込みはすべて1トランザクション（途中で失敗したら前回の状態のまま）
+        conn.isolation_level = None
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("BEGIN IMMEDIATE")
+        if force or get_meta(conn, 'schema_version') != str(SCHEMA_VERSION):
+            create_schema(conn)
+
+        # 章の定義が変わったときは chapters を作り直し、全単語の chapter_id を付け直す
+        chapter_digest = get_chapter_digest()
+        chapters_changed = get_meta(conn, 'chapters') != chapter_digest
+        if chapters_changed:
+            conn.execute("UPDATE words SET chapter_id = NULL")
+            conn.execute("DELETE FROM chapters")
+            conn.executemany("INSERT INTO chapters VALUES (?, ?, ?, ?, ?, ?)", chapter_rows())
+            conn.execute("UPDATE words SET chapter_id = "
+                         "(SELECT max(id) FROM chapters WHERE chapters.id <= words.main_number)")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('chapters', ?)", (chapter_digest,))
+        chapter_index = build_chapter_index(config.CHAPTER_MAP)
+
+        previous = {p: (file_id, digest) for file_id, p, digest in conn.execute("SELECT id, path, sha256 FROM source_files")}
+        current = set(json_files)
+        # 無くなったファイルの単語は、外部キーの ON DELETE CASCADE で関連する行ごと消える
+        removed = [previous[p][0] for p in previous if p not in current]
+        conn.executemany("DELETE FROM source_files WHERE id = ?", [(file_id,) for file_id in removed])
+
+        buffer = RowBuffer(next_id(conn, 'words'), next_id(conn, 'senses'), next_id(conn, 'examples'))
+        updated = 0
+        for json_file in json_files:
+            digest = hashlib.sha256(Path(json_file).read_bytes()).hexdigest()
+            if json_file in previous and previous[json_file][1] == digest:
+                continue
+            updated += 1
+            if json_file in previous:
+                file_id = previous[json_file][0]
+                conn.execute("DELETE FROM words WHERE source_file_id = ?", (file_id,))
+            else:
+                file_id = conn.execute("INSERT INTO source_files (path, sha256, word_count) VALUES (?, '', 0)",
+                                       (json_file,)).lastrowid
+            count = 0
+            for _offset, _size, record in iter_file_records(json_file):
+                buffer.add_word(Word.from_dict(record), file_id, chapter_index)
+                count += 1
+            conn.execute("UPDATE source_files SET sha256 = ?, word_count = ? WHERE id = ?", (digest, count, file_id))
+        buffer.flush(conn)
+        total_words = conn.execute("SELECT count(*) FROM words").fetchone()[0]
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    print(f"🗄 SQLite: {path}（{len(json_files)} ファイル中 {updated} 件を更新 / 削除 {len(removed)}、"
+          f"{total_words} 語、{time.perf_counter() - start_time:.2f}秒）")
+    return updated, len(json_files)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='単語データを SQLite（FTS5 の全文検索付き）に書き出す')
+    parser.add_argument('--db', type=Path, default=SQLITE_PATH, help='出力先のデータベース')
+    parser.add_argument('--force', action='store_true', help='差分を使わず作り直す')
+    args = parser.parse_args()
+    export_sqlite(path=args.db, force=args.force)
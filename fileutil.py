@@ -0,0 +1,35 @@
+import os
+from pathlib import Path
+
+import metrics
+
+
+def write_if_changed(path, content):
+    """内容が変わったときだけファイルを書き込む（mtime を無駄に更新しない）。書き込んだら True"""
+    path = Path(path)
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    metrics.add_io(bytes_written=len(data), files_written=1)
+    return True
+
+
+def remove_stale_files(directory, keep, pattern='*'):
+    """directory 内で pattern に一致し、keep（ファイル名の集合）に含まれないファイルを削除"""
+    directory = Path(directory)
+    removed = []
+    if not directory.is_dir():
+        return removed
+    for path in sorted(directory.glob(pattern)):
+        if path.is_file() and path.name not in keep:
+            path.unlink()
+            removed.append(path)
+    return removed
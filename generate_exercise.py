@@ -1,17 +1,231 @@
+import hashlib
 import json
-import os
 import re
+from collections import Counter
 from pathlib import Path
-from glob import glob
+import metrics
 from config import CHAPTER_MAP
+from chapters import build_chapter_index, find_chapter
+from corpus import load_sorted_words
+from fileutil import remove_stale_files, write_if_changed
+from models import split_pos
+
+# 演習ページ用に必要な項目だけを抜き出したデータの出力先
+EXERCISE_DATA_DIR = Path('exercise_data')
+BUNDLE_VERSION = 2
+# 4択の誤答候補として全チャプター共通で読み込む単語数
+DISTRACTOR_SAMPLE_SIZE = 200
+# 1語あたりに用意しておく誤答候補（似た単語）の数
+DISTRACTOR_POOL_SIZE = 8
+# 候補集めで、これより多くの単語に出てくる文字・文字ペアは手がかりにならないので使わない
+DISTRACTOR_MAX_POSTINGS = 100
+# 意味がこれ以上重なる単語は正解と紛らわしいので誤答候補にしない
+DISTRACTOR_MAX_MEANING_OVERLAP = 0.5
+# 意味の比較では（）内の補足と記号を除く
+MEANING_NOTE_RE = re.compile(r'[（(][^）)]*[）)]')
+# 間隔反復モードの初期値（ブラウザ側の IndexedDB に学習状態が無い単語に使う）
+SRS_INITIAL_INTERVAL_DAYS = 1.0
+SRS_INITIAL_EASE = 2.5
+SRS_NEW_PER_SESSION = 20
+# 初めて正解したあとの復習間隔は CHAPTER_MAP の順で決める。最初の章（基礎）はこの日数、
+# 最後の章に向かって SRS_INITIAL_INTERVAL_DAYS まで短くする
+SRS_FIRST_CHAPTER_INTERVAL_DAYS = 3.0
+MEANING_SKIP_RE = re.compile(r'[\s、，,。・〜～…「」『』【】\[\]<>a-zA-Z0-9:：;；/]')
+
+# ==========================================
+# 誤答候補の事前計算
+# ==========================================
+def get_pos_set(pos):
+    """品詞の集合（「他動詞」「自動詞」は「動詞」として扱う）"""
+    return frozenset(p for p, _detail in split_pos(pos))
+
+def get_spelling_grams(word):
+    """綴りの文字ペア（前後に空白を付けて語頭・語末も区別する）"""
+    text = f" {word.lower()} "
+    return frozenset(text[i:i + 2] for i in range(len(text) - 1))
+
+def get_meaning_chars(meaning):
+    return frozenset(MEANING_SKIP_RE.sub('', MEANING_NOTE_RE.sub('', meaning)))
+
+def overlap(a, b):
+    """Jaccard 係数"""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+def build_distractor_pools(sorted_words, chapter_index, pool_size=DISTRACTOR_POOL_SIZE, chapters=None):
+    """各語について、紛らわしい誤答候補の番号を似ている順に pool_size 個まで選び、番号 → 候補の dict で返す。
+    品詞・チャプター（と【】のグループ）が同じで、綴りか意味が似ている語ほど上位にする。
+    全組み合わせは比べず、綴りの文字ペアと意味の文字の転置索引で候補を絞ってから採点する。
+    chapters（チャプターIDの集合）を渡すと、そのチャプターの語の分だけを選ぶ（候補は全体から探す）"""
+    chapter_ids = [find_chapter(chapter_index, w.main_number) for w in sorted_words]
+    groups = {c: CHAPTER_MAP[c].partition('】')[0] for c in chapter_ids if c is not None}
+    pos_sets = [get_pos_set(w.pos) for w in sorted_words]
+    spellings = [get_spelling_grams(w.word) for w in sorted_words]
+    meanings = [get_meaning_chars(w.meaning) for w in sorted_words]
+    headwords = [w.word.lower() for w in sorted_words]
+
+    postings = {}
+    for i, (spelling, meaning) in enumerate(zip(spellings, meanings)):
+        for gram in spelling:
+            postings.setdefault(('s', gram), []).append(i)
+        for char in meaning:
+            postings.setdefault(('m', char), []).append(i)
+    keys_by_word = [[] for _ in sorted_words]
+    for ids in postings.values():
+        if len(ids) > DISTRACTOR_MAX_POSTINGS:
+            continue
+        for i in ids:
+            keys_by_word[i].append(ids)
+
+    # 同じチャプターで番号の近い語も候補に入れる（綴りも意味も似た語が少ないとき用）
+    chapter_members = {}
+    positions = []
+    for i, chapter_id in enumerate(chapter_ids):
+        members = chapter_members.setdefault(chapter_id, [])
+        positions.append(len(members))
+        members.append(i)
+    window = pool_size * 2
+
+    pools = {}
+    for i, w in enumerate(sorted_words):
+        if chapters is not None and (chapter_ids[i] or 0) not in chapters:
+            continue
+        shared = Counter()
+        for ids in keys_by_word[i]:
+            shared.update(ids)
+        candidates = {j for j, _ in shared.most_common(pool_size * 4)}
+        p = positions[i]
+        candidates.update(chapter_members[chapter_ids[i]][max(p - window, 0):p + window + 1])
+
+        scored = []
+        for j in candidates:
+            if j == i or headwords[j] == headwords[i]:
+                continue
+            meaning_score = overlap(meanings[i], meanings[j])
+            if meaning_score >= DISTRACTOR_MAX_MEANING_OVERLAP:
+                continue
+            score = (2.0 * bool(pos_sets[i] & pos_sets[j])
+                     + 1.0 * (chapter_ids[i] == chapter_ids[j])
+                     + 0.5 * (groups.get(chapter_ids[i]) == groups.get(chapter_ids[j]))
+                     + overlap(spellings[i], spellings[j])
+                     + meaning_score)
+            # 同点なら番号順にして毎回同じ結果にする
+            scored.append((-score, sorted_words[j].key, j))
+        scored.sort()
+        pools[w.number] = [sorted_words[j].number for _, _, j in scored[:pool_size]]
+    return pools
+
+def encode_bundle(words, chapter_index, with_examples=True, pools=None):
+    """演習で使う項目（番号・単語・意味・例文・チャプターID・誤答候補）だけを列指向にまとめる。
+    文字列は重複を除いたテーブル s に入れ、各列からは添字で参照する。
+    with_examples=False なら例文の列は空にする（誤答候補用）。
+    pools は 番号 → 誤答候補の番号のリスト（無ければ d 列は空）"""
+    strings = []
+    string_ids = {}
+
+    def ref(text):
+        text = text or ""
+        if text not in string_ids:
+            string_ids[text] = len(strings)
+            strings.append(text)
+        return string_ids[text]
+
+    bundle = {'v': BUNDLE_VERSION, 's': strings, 'n': [], 'c': [], 'w': [], 'm': [], 'x': [], 'd': []}
+    for w in words:
+        bundle['n'].append(w.number)
+        bundle['d'].append(pools.get(w.number, []) if pools else [])
+        bundle['c'].append(find_chapter(chapter_index, w.main_number))
+        bundle['w'].append(ref(w.word))
+        bundle['m'].append(ref(w.meaning))
+        # 例文はセクションごとに [en, ja, highlight, en, ja, highlight, ...] の平らな配列
+        sections = []
+        for section in (w.sections if with_examples else ()):
+            flat = []
+            for ex in section.examples:
+                flat += [ref(ex.en), ref(ex.ja), ref(ex.highlight)]
+            if flat:
+                sections.append(flat)
+        bundle['x'].append(sections)
+    return bundle
+
+def write_json_hashed(out_dir, stem, payload):
+    """payload を <stem>.<内容ハッシュ>.json として書き出し、ファイル名を返す"""
+    text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+    filename = f"{stem}.{digest}.json"
+    write_if_changed(out_dir / filename, text)
+    return filename
+
+def pick_distractor_sample(sorted_words, size=DISTRACTOR_SAMPLE_SIZE):
+    """4択の誤答候補用に、コーパス全体から等間隔に単語を選ぶ（毎回同じ結果になる）"""
+    if len(sorted_words) <= size:
+        return list(sorted_words)
+    step = len(sorted_words) / size
+    return [sorted_words[int(i * step)] for i in range(size)]
+
+def get_srs_interval(chapter_index, chapter_id):
+    """間隔反復モードで、そのチャプターの単語に初めて正解したあとの復習間隔（日）。
+    CHAPTER_MAP の前の章ほど長く、最後の章で SRS_INITIAL_INTERVAL_DAYS になる（範囲外の単語も同じ）"""
+    if chapter_id not in chapter_index or len(chapter_index) < 2:
+        return SRS_INITIAL_INTERVAL_DAYS
+    rank = chapter_index.index(chapter_id) / (len(chapter_index) - 1)
+    return round(SRS_FIRST_CHAPTER_INTERVAL_DAYS
+                 - (SRS_FIRST_CHAPTER_INTERVAL_DAYS - SRS_INITIAL_INTERVAL_DAYS) * rank, 2)
+
+def write_exercise_data(sorted_words, out_dir=EXERCISE_DATA_DIR, changed_chapters=None, cache=None):
+    """演習データをチャプターごとのシャードと誤答候補サンプルに分けて書き出し、マニフェストを返す。
+    ファイル名に内容のハッシュを含めるので、ブラウザは長期間キャッシュできる。
+    serve.py --watch からは changed_chapters（変更のあったチャプターIDの集合）と、前回の誤答候補・
+    シャードを覚えておく cache（dict）を渡す。誤答候補の計算とシャードの書き出しはそのチャプターだけになり、
+    ほかのチャプターの誤答候補は次の通常のビルドまで前回のまま"""
+    chapter_index = build_chapter_index(CHAPTER_MAP)
+    if cache is None or 'pools' not in cache:
+        changed_chapters = None
+    pools = cache['pools'] if changed_chapters is not None else {}
+    with metrics.measure('distractors'):
+        pools.update(build_distractor_pools(sorted_words, chapter_index, chapters=changed_chapters))
+    chapter_words = {}
+    for w in sorted_words:
+        chapter_words.setdefault(find_chapter(chapter_index, w.main_number) or 0, []).append(w)
+
+    shards = cache.get('shards', {}) if changed_chapters is not None else {}
+    written = set()
+    chapters = []
+    for chapter_id, words in chapter_words.items():
+        if chapter_id not in shards or changed_chapters is None or chapter_id in changed_chapters:
+            shards[chapter_id] = write_json_hashed(out_dir, f"chapter-{chapter_id}",
+                                                   encode_bundle(words, chapter_index, pools=pools))
+        filename = shards[chapter_id]
+        written.add(filename)
+        chapters.append({'id': chapter_id, 'file': f"{out_dir.as_posix()}/{filename}", 'count': len(words),
+                         'interval': get_srs_interval(chapter_index, chapter_id)})
+    if cache is not None:
+        cache.update(pools=pools, shards=shards)
+
+    # 誤答候補は例文が要らないので単語と意味だけにする
+    sample = pick_distractor_sample(sorted_words)
+    sample_filename = write_json_hashed(out_dir, 'sample', encode_bundle(sample, chapter_index, with_examples=False))
+    written.add(sample_filename)
+
+    manifest = {
+        'v': BUNDLE_VERSION,
+        'chapters': chapters,
+        'sample': f"{out_dir.as_posix()}/{sample_filename}",
+        'srs': {'interval': SRS_INITIAL_INTERVAL_DAYS, 'ease': SRS_INITIAL_EASE, 'new': SRS_NEW_PER_SESSION},
+    }
+    write_if_changed(out_dir / 'manifest.json', json.dumps(manifest, ensure_ascii=False, indent=1) + '\n')
+    written.add('manifest.json')
+    removed = remove_stale_files(out_dir, written, '*.json')
+    print(f"📦 演習データ: チャプター {len(chapters)} 件 + 誤答候補 {len(sample)} 語（削除 {len(removed)}）")
+    return manifest
+
+def generate_html(sorted_words=None, changed_chapters=None, cache=None):
+    """exercise.html と演習データを生成する（changed_chapters / cache は write_exercise_data を参照）"""
+    if sorted_words is None:
+        sorted_words = load_sorted_words()
 
-def get_json_file_list():
-    """使用するJSONファイル名のリストを取得"""
-    json_files = ['vocabulary_data.json'] + sorted(glob('vocabulary_data_*.json'), 
-                  key=lambda x: int(re.search(r'_(\d+)\.json', x).group(1)) if '_' in x else 0)
-    return [jf for jf in json_files if os.path.exists(jf)]
-
-def generate_html():
     # チャプターをグループ化
     from collections import defaultdict
     grouped = defaultdict(list)
@@ -21,7 +235,10 @@ def generate_html():
         grouped[group_name].append({"id": s_num, "label": display_label})
     
     chapters_js = json.dumps(dict(grouped), ensure_ascii=False)
-    json_files_js = json.dumps(get_json_file_list())
+    # 演習用データ（必要な項目だけ・チャプターごと）を書き出し、マニフェストはページに埋め込む
+    with metrics.measure('data'):
+        manifest = write_exercise_data(sorted_words, changed_chapters=changed_chapters, cache=cache)
+    manifest_js = json.dumps(manifest, ensure_ascii=False)
     
     html_template = f"""<!DOCTYPE html>
 <html lang="ja">
@@ -65,6 +282,7 @@ def generate_html():
         .nav-controls {{ display: flex; justify-content: space-between; gap: 12px; margin-top: 20px; }}
         .nav-btn {{ flex: 1; padding: 12px; border: 1px solid #ccc; border-radius: 8px; cursor: pointer; background: #fff; font-weight: bold; transition: 0.2s; }}
         .nav-btn:hover:not(:disabled) {{ background: #f0f0f0; }}
+        .finish {{ text-align: center; padding: 30px 10px; font-size: 1.1rem; line-height: 1.8; }}
         .nav-btn:disabled {{ opacity: 0.3; cursor: not-allowed; }}
 
         /* 4択・穴埋めスタイル */
@@ -102,7 +320,8 @@ def generate_html():
         <div class="option-group">
             <label class="group-label">2. 出題順序</label>
             <label style="margin-right:20px; cursor:pointer;"><input type="radio" name="orderType" value="random" checked> ランダム</label>
-            <label style="cursor:pointer;"><input type="radio" name="orderType" value="sequential"> 番号順</label>
+            <label style="margin-right:20px; cursor:pointer;"><input type="radio" name="orderType" value="sequential"> 番号順</label>
+            <label style="cursor:pointer;"><input type="radio" name="orderType" value="srs"> 間隔反復（復習が必要な単語から）</label>
         </div>
 
         <div class="option-group">
@@ -125,7 +344,7 @@ def generate_html():
         <button id="mainActionBtn" class="btn" style="display:none;"></button>
         
         <div style="display:flex; gap:10px; margin-top:20px;">
-            <button class="btn" style="background:#6c757d; flex:1;" onclick="location.reload()">演習をやり直す</button>
+            <button class="btn" style="background:#6c757d; flex:1;" onclick="backToSetup()">演習をやり直す</button>
             <a href="index.html" class="btn" style="background:#444; flex:1; text-decoration:none; text-align:center; line-height:1.2;">ホームに戻る</a>
         </div>
     </div>
@@ -133,33 +352,106 @@ def generate_html():
 
 <script>
 const GROUPED_CHAPTERS = {chapters_js};
-const JSON_FILES = {json_files_js};
-let ALL_WORDS = [];
+const MANIFEST = {manifest_js};
+const CHAPTER_FILES = new Map(MANIFEST.chapters.map(ch => [ch.id, ch.file]));
+const CHAPTER_ORDER = MANIFEST.chapters.map(ch => ch.id);
+const chapterLoads = new Map();  // チャプターID → 単語配列の Promise
+let SAMPLE_WORDS = [];           // 誤答候補用の共通サンプル
+const WORDS_BY_NUMBER = new Map();  // 番号 → 読み込み済みの単語（チャプター + サンプル）
+
+// 乱数は種から作る（?seed=123 を付けると同じ出題順・同じ選択肢を再現できる）
+const SEED = (Number(new URLSearchParams(location.search).get('seed')) || Date.now()) >>> 0;
+function mulberry32(a) {{
+    return function() {{
+        a = (a + 0x6D2B79F5) | 0;
+        let t = Math.imul(a ^ (a >>> 15), 1 | a);
+        t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    }};
+}}
+const random = mulberry32(SEED);
 
-// データの非同期読み込み
-async function loadAllData() {{
-    try {{
-        const results = await Promise.all(JSON_FILES.map(file => fetch(file).then(r => r.json())));
-        results.forEach(data => {{
-            if (data.words) {{
-                data.words.forEach(w => {{
-                    ALL_WORDS.push({{ 
-                        n: String(w.number), 
-                        w: w.word, 
-                        m: w.meaning,
-                        examples: w.example_sections || []
-                    }});
-                }});
-            }}
+// Fisher–Yates シャッフル（配列をその場で並べ替えて返す）
+function shuffle(array) {{
+    for (let i = array.length - 1; i > 0; i--) {{
+        const j = Math.floor(random() * (i + 1));
+        [array[i], array[j]] = [array[j], array[i]];
+    }}
+    return array;
+}}
+
+function registerWords(words) {{
+    words.forEach(w => WORDS_BY_NUMBER.set(w.n, w));
+}}
+
+// 列指向の演習データを、画面で使う単語オブジェクトに展開
+function decodeBundle(b) {{
+    const s = b.s;
+    const words = [];
+    for (let i = 0; i < b.n.length; i++) {{
+        words.push({{
+            n: String(b.n[i]),
+            c: b.c[i],
+            w: s[b.w[i]],
+            m: s[b.m[i]],
+            d: (b.d && b.d[i] || []).map(String),  // 似た単語（誤答候補）の番号。似ている順
+            examples: b.x[i].map(flat => {{
+                const examples = [];
+                for (let j = 0; j < flat.length; j += 3) {{
+                    examples.push({{ en: s[flat[j]], ja: s[flat[j + 1]], highlight: s[flat[j + 2]] }});
+                }}
+                return {{ examples }};
+            }})
+        }});
+    }}
+    return words;
+}}
+
+function fetchBundle(file) {{
+    return fetch(file).then(r => {{ if (!r.ok) throw new Error(`${{file}}: ${{r.status}}`); return r.json(); }}).then(decodeBundle);
+}}
+
+// チャプター単位の読み込み（同じチャプターは一度だけ取得）
+function loadChapter(chapterId) {{
+    const file = CHAPTER_FILES.get(chapterId);
+    if (!file) return Promise.resolve([]);
+    if (!chapterLoads.has(chapterId)) {{
+        const load = fetchBundle(file).then(words => {{
+            registerWords(words);
+            return words;
         }});
-        document.getElementById('loadingStatus').style.display = 'none';
-        document.getElementById('setup').classList.add('active');
-        document.getElementById('startBtn').disabled = false;
-        document.getElementById('startBtn').innerText = '演習開始！';
-    }} catch (e) {{ 
-        document.getElementById('loadingStatus').innerText = "データの読み込みに失敗しました。";
-        console.error(e); 
+        load.catch(() => chapterLoads.delete(chapterId));
+        chapterLoads.set(chapterId, load);
     }}
+    return chapterLoads.get(chapterId);
+}}
+
+// 選択したチャプターの前後を、空いた時間に先読みしておく
+function prefetchNeighbours(selectedIds) {{
+    const neighbours = new Set();
+    selectedIds.forEach(id => {{
+        const i = CHAPTER_ORDER.indexOf(id);
+        if (i > 0) neighbours.add(CHAPTER_ORDER[i - 1]);
+        if (i >= 0 && i < CHAPTER_ORDER.length - 1) neighbours.add(CHAPTER_ORDER[i + 1]);
+    }});
+    const idle = window.requestIdleCallback || (cb => setTimeout(cb, 200));
+    idle(() => neighbours.forEach(id => loadChapter(id).catch(() => {{}})));
+}}
+
+function loadSample() {{
+    fetchBundle(MANIFEST.sample).then(words => {{
+        SAMPLE_WORDS = words;
+        registerWords(words);
+    }}).catch(e => console.error(e));
+}}
+
+// 初期表示ではデータを待たない（サンプルだけ裏で取得）
+function initSetup() {{
+    document.getElementById('loadingStatus').style.display = 'none';
+    document.getElementById('setup').classList.add('active');
+    document.getElementById('startBtn').disabled = false;
+    document.getElementById('startBtn').innerText = '演習開始！';
+    loadSample();
 }}
 
 // チャプターリストの構築
@@ -176,6 +468,8 @@ for (const [group, chapters] of Object.entries(GROUPED_CHAPTERS)) {{
         const div = document.createElement('div');
         div.className = 'chapter-item';
         div.innerHTML = `<label><input type="checkbox" name="chapters" value="${{ch.id}}"> ${{ch.label}}</label>`;
+        // チェックした時点で読み込みを始めておく
+        div.querySelector('input').addEventListener('change', e => {{ if (e.target.checked) loadChapter(ch.id).catch(() => {{}}); }});
         grid.appendChild(div);
     }});
     chapterListDiv.appendChild(grid);
@@ -184,18 +478,172 @@ for (const [group, chapters] of Object.entries(GROUPED_CHAPTERS)) {{
 let quizWords = [];
 let currentIndex = 0;
 let isFlipped = false;
+let srs = null;  // 間隔反復モードのセッション（それ以外のモードでは null）
+
+// ==========================================
+// 間隔反復: 学習状態は IndexedDB に 1 語 1 レコードで保存する
+// ==========================================
+const SRS_DB_NAME = 'vocab-srs';
+const SRS_STORE = 'cards';
+const DAY_MS = 24 * 60 * 60 * 1000;
+const RELEARN_MS = 60 * 1000;  // 間違えた単語は 1 分後にもう一度
+
+function openSrsDb() {{
+    return new Promise((resolve, reject) => {{
+        if (!window.indexedDB) {{ reject(new Error('IndexedDB is not available')); return; }}
+        const req = indexedDB.open(SRS_DB_NAME, 1);
+        req.onupgradeneeded = () => req.result.createObjectStore(SRS_STORE, {{ keyPath: 'n' }});
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+    }});
+}}
+
+function loadSrsStates(db) {{
+    return new Promise((resolve, reject) => {{
+        const req = db.transaction(SRS_STORE).objectStore(SRS_STORE).getAll();
+        req.onsuccess = () => resolve(new Map(req.result.map(state => [state.n, state])));
+        req.onerror = () => reject(req.error);
+    }});
+}}
+
+function saveSrsState(db, state) {{
+    if (!db) return;
+    const tx = db.transaction(SRS_STORE, 'readwrite');
+    tx.objectStore(SRS_STORE).put(state);
+    tx.onerror = () => console.error(tx.error);
+}}
+
+// 出題予定時刻 due をキーにした二分ヒープ（次の単語の取り出しは O(log n)）
+class MinHeap {{
+    constructor() {{ this.items = []; }}
+    get size() {{ return this.items.length; }}
+    peek() {{ return this.items[0]; }}
+    push(item) {{
+        const a = this.items;
+        a.push(item);
+        let i = a.length - 1;
+        while (i > 0) {{
+            const parent = (i - 1) >> 1;
+            if (a[parent].due <= item.due) break;
+            a[i] = a[parent];
+            i = parent;
+        }}
+        a[i] = item;
+    }}
+    pop() {{
+        const a = this.items;
+        const top = a[0];
+        const last = a.pop();
+        if (a.length > 0) {{
+            let i = 0;
+            for (;;) {{
+                const l = 2 * i + 1, r = l + 1;
+                let child = l;
+                if (r < a.length && a[r].due < a[l].due) child = r;
+                if (child >= a.length || a[child].due >= last.due) break;
+                a[i] = a[child];
+                i = child;
+            }}
+            a[i] = last;
+        }}
+        return top;
+    }}
+}}
+
+// 選択したチャプターの単語を振り分ける。学習済みの単語は保存された due をキーに復習用のヒープへ、
+// 新出単語は読み込んだ順（チャプター順・番号順）の待ち行列へ。
+// 初回の復習間隔はビルド時に CHAPTER_MAP の順から決めたチャプターごとの値を使う
+function createSrsSession(words, states, db) {{
+    const params = MANIFEST.srs;
+    const intervals = new Map(MANIFEST.chapters.map(ch => [ch.id, ch.interval]));
+    const reviews = new MinHeap();
+    const fresh = [];
+    words.forEach(word => {{
+        const state = states.get(word.n);
+        if (state) reviews.push({{ due: state.due, word, state, relearn: false }});
+        else fresh.push({{ word, state: null }});
+    }});
+    return {{ db, reviews, fresh, freshPos: 0, params, intervals, newShown: 0, reviewed: 0, relearning: 0,
+             current: null, timer: null }};
+}}
 
-function startExercise() {{
+// 次に出す単語。期限が来た復習（やり直しを含む）→ 新出単語（1 回あたり上限まで）の順で、無ければ null
+function nextSrsWord(session) {{
+    const reviews = session.reviews;
+    let entry = null;
+    if (reviews.size > 0 && reviews.peek().due <= Date.now()) {{
+        entry = reviews.pop();
+        if (entry.relearn) session.relearning--;
+    }} else if (session.newShown < session.params.new && session.freshPos < session.fresh.length) {{
+        entry = session.fresh[session.freshPos++];
+        session.newShown++;
+    }}
+    session.current = entry;
+    return entry ? entry.word : null;
+}}
+
+// 回答結果から次の出題予定を決めて保存する（SM-2 を簡略化したもの）
+function recordSrsAnswer(session, word, correct) {{
+    const entry = session.current;
+    if (!entry || entry.word !== word) return;
+    session.current = null;
+    session.reviewed++;
+    const now = Date.now();
+    const state = entry.state || {{ n: word.n, interval: 0, ease: session.params.ease, reps: 0, lapses: 0, due: now }};
+    if (correct) {{
+        state.reps++;
+        state.interval = state.reps === 1
+            ? (session.intervals.get(word.c) || session.params.interval)
+            : state.interval * state.ease;
+        state.ease = Math.min(state.ease + 0.05, 3.0);
+        state.due = now + state.interval * DAY_MS;
+    }} else {{
+        state.reps = 0;
+        state.lapses++;
+        state.ease = Math.max(state.ease - 0.2, 1.3);
+        state.interval = 0;
+        state.due = now + RELEARN_MS;
+        // 同じセッションのうちにもう一度出す（期限までは他の単語を出すか、待つ）
+        session.reviews.push({{ due: state.due, word, state, relearn: true }});
+        session.relearning++;
+    }}
+    saveSrsState(session.db, state);
+}}
+
+async function startSrs(words) {{
+    let db = null;
+    let states = new Map();
+    try {{
+        db = await openSrsDb();
+        states = await loadSrsStates(db);
+    }} catch (e) {{
+        // 保存できない環境でも、このページを開いている間は動くようにする
+        console.warn('学習状態を保存できません:', e);
+    }}
+    return createSrsSession(words, states, db);
+}}
+
+async function startExercise() {{
     const selected = Array.from(document.querySelectorAll('input[name="chapters"]:checked')).map(cb => parseInt(cb.value));
     if(selected.length === 0) {{ alert("チャプターを選択してください"); return; }}
-    
-    let thresholds = Object.keys(GROUPED_CHAPTERS).flatMap(g => GROUPED_CHAPTERS[g].map(ch => parseInt(ch.id))).sort((a,b)=>a-b);
 
-    quizWords = ALL_WORDS.filter(w => {{
-        const n = parseInt(w.n.split('-')[0]);
-        const chapterId = thresholds.slice().reverse().find(t => n >= t);
-        return selected.includes(chapterId);
-    }});
+    // 選択したチャプターのデータだけを取得する
+    const startBtn = document.getElementById('startBtn');
+    startBtn.disabled = true;
+    startBtn.innerText = '読み込み中...';
+    try {{
+        const chapters = await Promise.all(selected.sort((a, b) => a - b).map(loadChapter));
+        quizWords = chapters.flat();
+    }} catch (e) {{
+        console.error(e);
+        alert("データの読み込みに失敗しました。");
+        return;
+    }} finally {{
+        startBtn.disabled = false;
+        startBtn.innerText = '演習開始！';
+    }}
+    prefetchNeighbours(selected);
+    if(quizWords.length === 0) {{ alert("選択した範囲に単語がありません。"); return; }}
 
     const mode = document.getElementById('mode').value;
     if(mode === 'fill-blank') {{
@@ -203,14 +651,27 @@ function startExercise() {{
         if(quizWords.length === 0) {{ alert("選択した範囲に例文つきの単語がありません。"); return; }}
     }}
 
-    if(document.querySelector('input[name="orderType"]:checked').value === 'random') {{
-        quizWords.sort(() => Math.random() - 0.5);
+    const orderType = document.querySelector('input[name="orderType"]:checked').value;
+    srs = null;
+    if(orderType === 'random') {{
+        shuffle(quizWords);
+    }} else if(orderType === 'srs') {{
+        // quizWords は出題した順の履歴になり、次の単語はヒープから取り出す
+        srs = await startSrs(quizWords);
+        quizWords = [];
     }}
 
     currentIndex = 0;
     document.getElementById('setup').classList.remove('active');
     document.getElementById('quiz').classList.add('active');
-    showQuestion();
+    checkEnd();
+}}
+
+function backToSetup() {{
+    if(srs) clearTimeout(srs.timer);
+    srs = null;
+    document.getElementById('quiz').classList.remove('active');
+    document.getElementById('setup').classList.add('active');
 }}
 
 function showQuestion() {{
@@ -219,7 +680,9 @@ function showQuestion() {{
     const container = document.getElementById('quizContainer');
     const mainBtn = document.getElementById('mainActionBtn');
     
-    document.getElementById('progressText').innerText = `STEP: ${{currentIndex + 1}} / ${{quizWords.length}} (No. ${{word.n}})`;
+    document.getElementById('progressText').innerText = srs
+        ? `復習: ${{currentIndex + 1}} 問目 / 新出 ${{srs.newShown}} / ${{srs.params.new}} (No. ${{word.n}})`
+        : `STEP: ${{currentIndex + 1}} / ${{quizWords.length}} (No. ${{word.n}})`;
     container.innerHTML = '';
     mainBtn.style.display = 'none';
 
@@ -235,8 +698,8 @@ function showQuestion() {{
 // 例文穴埋めモードの描画
 function showFillBlank(word) {{
     const container = document.getElementById('quizContainer');
-    const section = word.examples[Math.floor(Math.random() * word.examples.length)];
-    const ex = section.examples[Math.floor(Math.random() * section.examples.length)];
+    const section = word.examples[Math.floor(random() * word.examples.length)];
+    const ex = section.examples[Math.floor(random() * section.examples.length)];
     const target = ex.highlight;
     const parts = ex.en.split(new RegExp(`(${{target}})`, 'i'));
 
@@ -278,7 +741,8 @@ function checkFillBlank(correctAnswer) {{
     const userAns = input.value.trim().toLowerCase();
     
     input.disabled = true;
-    if(userAns === correctAnswer.toLowerCase()) {{
+    const correct = userAns === correctAnswer.toLowerCase();
+    if(correct) {{
         input.className = 'blank-input correct';
         feedback.innerText = '✨ 正解です！';
         feedback.style.color = 'var(--success)';
@@ -289,7 +753,7 @@ function checkFillBlank(correctAnswer) {{
     }}
     
     mainBtn.innerText = '次の問題へ';
-    mainBtn.onclick = () => {{ currentIndex++; checkEnd(); }};
+    mainBtn.onclick = () => advance(correct);
 }}
 
 // 暗記カードの描画
@@ -301,7 +765,8 @@ function showCard(word, mode) {{
             ${{mode === 'card-en-ja' ? word.w : word.m}}
         </div>
         <div class="nav-controls">
-            <button id="prevBtn" class="nav-btn" onclick="goBack()" ${{currentIndex === 0 ? 'disabled' : ''}}>← 前へ戻る</button>
+            <button id="prevBtn" class="nav-btn" onclick="goBack()" ${{currentIndex === 0 || srs ? 'disabled' : ''}}>← 前へ戻る</button>
+            <button id="forgotBtn" class="nav-btn" onclick="advance(false)" style="display:none;">覚えていなかった</button>
             <button id="nextBtn" class="nav-btn" onclick="flipCard()" style="background:var(--primary); color:white; border:none;">答えを見る / 次へ →</button>
         </div>
     `;
@@ -315,8 +780,12 @@ function flipCard() {{
         card.innerText = mode === 'card-en-ja' ? word.m : word.w;
         card.classList.add('flipped');
         isFlipped = true;
+        if(srs) {{
+            document.getElementById('forgotBtn').style.display = 'block';
+            document.getElementById('nextBtn').innerText = '覚えていた →';
+        }}
     }} else {{
-        currentIndex++; checkEnd();
+        advance(true);
     }}
 }}
 
@@ -331,12 +800,8 @@ function showQuiz(word, mode) {{
         <div class="options-grid" id="options"></div>
     `;
     
-    let choices = [word];
-    while(choices.length < 4 && ALL_WORDS.length > 4) {{
-        const r = ALL_WORDS[Math.floor(Math.random() * ALL_WORDS.length)];
-        if(!choices.find(o => o.n === r.n)) choices.push(r);
-    }}
-    choices.sort(() => Math.random() - 0.5);
+    const choices = shuffle([word, ...pickDistractors(word, 3)]);
+    let missed = false;  // 一度でも間違えたら不正解として記録する
     
     const optionsDiv = document.getElementById('options');
     choices.forEach(opt => {{
@@ -347,28 +812,97 @@ function showQuiz(word, mode) {{
             if(opt.n === word.n) {{
                 btn.style.background = '#d4edda';
                 btn.style.borderColor = 'var(--success)';
-                setTimeout(() => {{ currentIndex++; checkEnd(); }}, 500);
+                setTimeout(() => advance(!missed), 500);
             }} else {{
                 btn.style.background = '#f8d7da';
                 btn.style.borderColor = 'var(--danger)';
                 btn.disabled = true;
+                missed = true;
             }}
         }};
         optionsDiv.appendChild(btn);
     }});
 }}
 
+// 誤答候補を count 個選ぶ。ビルド時に用意した似た単語のうち読み込み済みのものを優先し、
+// 足りない分は共通サンプル（まだ無ければ出題中の単語）から補う
+function pickDistractors(word, count) {{
+    const used = new Set([word.n]);
+    const similar = shuffle(word.d.map(n => WORDS_BY_NUMBER.get(n)).filter(w => w && w.m !== word.m));
+    const picked = [];
+    for (const w of similar) {{
+        if (picked.length === count) break;
+        if (!used.has(w.n)) {{ used.add(w.n); picked.push(w); }}
+    }}
+    const fallback = SAMPLE_WORDS.length ? SAMPLE_WORDS : quizWords;
+    // 乱数で決めた位置から順に見るので、重複があっても試行回数は候補数で頭打ちになる
+    const start = Math.floor(random() * fallback.length);
+    for (let k = 0; k < fallback.length && picked.length < count; k++) {{
+        const w = fallback[(start + k) % fallback.length];
+        if (!used.has(w.n) && w.m !== word.m) {{ used.add(w.n); picked.push(w); }}
+    }}
+    return picked;
+}}
+
 function goBack() {{ if(currentIndex > 0) {{ currentIndex--; showQuestion(); }} }}
-function checkEnd() {{ if(currentIndex < quizWords.length) showQuestion(); else {{ alert("全問終了しました！お疲れ様でした。"); location.reload(); }} }}
+// 1 問終えたら結果を記録して次へ
+function advance(correct) {{
+    if(srs) recordSrsAnswer(srs, quizWords[currentIndex], correct);
+    currentIndex++;
+    checkEnd();
+}}
+
+function checkEnd() {{
+    if(srs && currentIndex >= quizWords.length) {{
+        const next = nextSrsWord(srs);
+        if(next) quizWords.push(next);
+        else if(srs.relearning > 0) {{ showSrsWaiting(); return; }}
+    }}
+    if(currentIndex < quizWords.length) showQuestion(); else showFinished();
+}}
+
+// 出せる単語が無く、やり直しの単語の期限を待っているとき
+function showSrsWaiting() {{
+    const wait = Math.max(srs.reviews.peek().due - Date.now(), 0);
+    document.getElementById('quizContainer').innerHTML = `
+        <div class="finish">⏳ 間違えた単語をもう一度出すまで、あと ${{Math.ceil(wait / 1000)}} 秒お待ちください。</div>
+        <div class="nav-controls"><button class="nav-btn" onclick="finishSrs()">ここで終わる</button></div>
+    `;
+    srs.timer = setTimeout(checkEnd, wait);
+}}
+
+function finishSrs() {{
+    clearTimeout(srs.timer);
+    showFinished();
+}}
+
+// 終了画面（ページは読み込み直さず、同じ範囲でもう一度か設定に戻るかを選ぶ）
+function showFinished() {{
+    const container = document.getElementById('quizContainer');
+    const mainBtn = document.getElementById('mainActionBtn');
+    let message = '全問終了しました！お疲れ様でした。';
+    if(srs) {{
+        const remaining = srs.fresh.length - srs.freshPos;
+        message = `今回の復習は終わりました（${{srs.reviewed}} 問）。`;
+        if(remaining > 0) message += `<br>新しい単語（残り ${{remaining}} 語）は次回に続きます。`;
+        if(srs.reviews.size > 0) message += `<br>次の復習: ${{new Date(srs.reviews.peek().due).toLocaleString()}}`;
+    }}
+    document.getElementById('progressText').innerText = srs ? '復習完了' : `STEP: ${{quizWords.length}} / ${{quizWords.length}}`;
+    container.innerHTML = `<div class="finish">🎉 ${{message}}</div>`;
+    mainBtn.style.display = quizWords.length > 0 && !srs ? 'block' : 'none';
+    mainBtn.style.background = 'var(--primary)';
+    mainBtn.innerText = 'もう一度（順番を入れ替えて）';
+    mainBtn.onclick = () => {{ shuffle(quizWords); currentIndex = 0; showQuestion(); }};
+}}
 
 // 実行
-loadAllData();
+initSetup();
 </script>
+<script src="sw-register.js"></script>
 </body>
 </html>"""
 
-    with open("exercise.html", "w", encoding="utf-8") as f:
-        f.write(html_template)
+    write_if_changed("exercise.html", html_template)
     print("✓ exercise.html has been generated with Home button and new Layout.")
 
 if __name__ == "__main__":
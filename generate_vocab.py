@@ -1,8 +1,84 @@
+import argparse
+import hashlib
 import json
+import multiprocessing
 import os
 import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from glob import glob
+
+import crossref
+import metrics
+import models
+import templating
+from corpus import CorpusError, iter_run_words, iter_sorted_words, list_vocabulary_files, load_sorted_words
+from fileutil import remove_stale_files, write_if_changed
+from crossref import build_headword_index, find_dangling_links, print_dangling_links, resolve_word_links
+from models import get_filename
+from templating import Markup, Template, allow_breaks, escape
+
+# 増分ビルド用マニフェスト（各ページの入力ハッシュを記録）
+MANIFEST_PATH = Path('data') / '.build-manifest.json'
+MANIFEST_VERSION = 1
+# 並列生成時に1つのワーカーへまとめて渡すページ数
+PAGE_BATCH_SIZE = 128
+
+# 単語ページ共通のスタイルシート（assets/word.<内容ハッシュ>.css として1つだけ出力）
+STYLESHEET_DIR = Path('assets')
+WORD_PAGE_CSS = """:root { --primary-color: #2c3e50; --accent-color: #f4f7f6; --text-main: #333; --text-sub: #666; }
+/* サブ単語（関連語）ページは緑系の配色 */
+.word-page--sub { --primary-color: #28a745; --accent-color: #f4faf6; }
+body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; line-height: 1.7; color: var(--text-main); max-width: 700px; margin: 0 auto; padding: 30px 20px; background-color: #f0f2f5; }
+.card { background: white; padding: 40px; border-radius: 16px; box-shadow: 0 4px 20px rgba(0,0,0,0.08); }
+
+/* ナビゲーション */
+.nav-buttons { display: flex; justify-content: space-between; margin-bottom: 20px; gap: 10px; }
+.nav-button { flex: 1; padding: 12px 20px; border: 2px solid var(--primary-color); background: white; color: var(--primary-color); text-decoration: none; border-radius: 8px; font-weight: bold; text-align: center; transition: 0.3s; cursor: pointer; }
+.nav-button:hover:not(.disabled) { background: var(--primary-color); color: white; }
+.nav-button.disabled { opacity: 0.3; cursor: not-allowed; border-color: #ccc; color: #ccc; }
+
+/* ヘッダー部分 */
+.back-link { display: inline-block; margin-bottom: 25px; text-decoration: none; color: var(--primary-color); font-weight: bold; }
+.word-header { border-bottom: 3px solid var(--primary-color); padding-bottom: 15px; margin-bottom: 25px; }
+.word-number { font-size: 1rem; color: var(--text-sub); font-weight: bold; }
+.word-title { font-size: 3rem; margin: 5px 0; letter-spacing: 1px; }
+.pos-tag { display: inline-block; background: var(--primary-color); color: white; padding: 2px 12px; border-radius: 20px; font-size: 0.85rem; vertical-align: middle; margin-left: 10px; }
+
+/* コンテンツ部分 */
+.section-title { font-size: 1.1rem; font-weight: bold; color: var(--primary-color); margin-top: 25px; margin-bottom: 10px; display: flex; align-items: center; }
+.section-title::before { content: ""; display: inline-block; width: 4px; height: 18px; background: var(--primary-color); margin-right: 10px; border-radius: 2px; }
+
+.meaning-jp { 
+    font-size: 1.5rem; 
+    font-weight: bold; 
+    display: block;
+    margin-bottom: 15px; 
+    padding: 10px 0;
+    color: var(--text-main);
+    background: transparent;
+}
+.nuance-box { background: var(--accent-color); padding: 15px; border-radius: 8px; font-size: 0.95rem; border: 1px dashed var(--primary-color); }
+
+/* 例文 */
+.example-item { margin-bottom: 15px; padding-left: 15px; border-left: 3px solid #ddd; }
+.en { display: block; font-weight: 500; color: #444; }
+.ja { display: block; color: var(--text-sub); font-size: 0.9rem; }
+
+/* リスト */
+.info-grid { display: grid; grid-template-columns: 1fr 1fr; gap: 20px; margin-top: 20px; }
+.info-item { background: #f8f9fa; padding: 12px; border-radius: 8px; font-size: 0.9rem; }
+.info-label { display: block; font-weight: bold; color: var(--text-sub); font-size: 0.8rem; text-transform: uppercase; margin-bottom: 5px; }
+.list-unit { margin-bottom: 4px; border-bottom: 1px solid #eee; padding-bottom: 2px; }
+.list-unit:last-child { border-bottom: none; }
+.word-small { font-weight: bold; color: #444; }
+.trans-small { color: var(--text-sub); font-size: 0.85em; margin-left: 5px; }
+
+@media (max-width: 600px) { .info-grid { grid-template-columns: 1fr; } .word-title { font-size: 2.2rem; } }
+"""
 
 # メイン単語用のHTMLテンプレート
 HTML_TEMPLATE_MAIN = """<!DOCTYPE html>
@@ -11,57 +87,9 @@ HTML_TEMPLATE_MAIN = """<!DOCTYPE html>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{number} {word}</title>
-    <style>
-        :root {{ --primary-color: #2c3e50; --accent-color: #f4f7f6; --text-main: #333; --text-sub: #666; }}
-        body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; line-height: 1.7; color: var(--text-main); max-width: 700px; margin: 0 auto; padding: 30px 20px; background-color: #f0f2f5; }}
-        .card {{ background: white; padding: 40px; border-radius: 16px; box-shadow: 0 4px 20px rgba(0,0,0,0.08); }}
-        
-        /* ナビゲーション */
-        .nav-buttons {{ display: flex; justify-content: space-between; margin-bottom: 20px; gap: 10px; }}
-        .nav-button {{ flex: 1; padding: 12px 20px; border: 2px solid var(--primary-color); background: white; color: var(--primary-color); text-decoration: none; border-radius: 8px; font-weight: bold; text-align: center; transition: 0.3s; cursor: pointer; }}
-        .nav-button:hover:not(.disabled) {{ background: var(--primary-color); color: white; }}
-        .nav-button.disabled {{ opacity: 0.3; cursor: not-allowed; border-color: #ccc; color: #ccc; }}
-        
-        /* ヘッダー部分 */
-        .back-link {{ display: inline-block; margin-bottom: 25px; text-decoration: none; color: var(--primary-color); font-weight: bold; }}
-        .word-header {{ border-bottom: 3px solid var(--primary-color); padding-bottom: 15px; margin-bottom: 25px; }}
-        .word-number {{ font-size: 1rem; color: var(--text-sub); font-weight: bold; }}
-        .word-title {{ font-size: 3rem; margin: 5px 0; letter-spacing: 1px; }}
-        .pos-tag {{ display: inline-block; background: var(--primary-color); color: white; padding: 2px 12px; border-radius: 20px; font-size: 0.85rem; vertical-align: middle; margin-left: 10px; }}
-
-        /* コンテンツ部分 */
-        .section-title {{ font-size: 1.1rem; font-weight: bold; color: var(--primary-color); margin-top: 25px; margin-bottom: 10px; display: flex; align-items: center; }}
-        .section-title::before {{ content: ""; display: inline-block; width: 4px; height: 18px; background: var(--primary-color); margin-right: 10px; border-radius: 2px; }}
-        
-        .meaning-jp {{ 
-            font-size: 1.5rem; 
-            font-weight: bold; 
-            display: block;
-            margin-bottom: 15px; 
-            padding: 10px 0;
-            color: var(--text-main);
-            background: transparent;
-        }}
-        .nuance-box {{ background: var(--accent-color); padding: 15px; border-radius: 8px; font-size: 0.95rem; border: 1px dashed var(--primary-color); }}
-
-        /* 例文 */
-        .example-item {{ margin-bottom: 15px; padding-left: 15px; border-left: 3px solid #ddd; }}
-        .en {{ display: block; font-weight: 500; color: #444; }}
-        .ja {{ display: block; color: var(--text-sub); font-size: 0.9rem; }}
-
-        /* リスト */
-        .info-grid {{ display: grid; grid-template-columns: 1fr 1fr; gap: 20px; margin-top: 20px; }}
-        .info-item {{ background: #f8f9fa; padding: 12px; border-radius: 8px; font-size: 0.9rem; }}
-        .info-label {{ display: block; font-weight: bold; color: var(--text-sub); font-size: 0.8rem; text-transform: uppercase; margin-bottom: 5px; }}
-        .list-unit {{ margin-bottom: 4px; border-bottom: 1px solid #eee; padding-bottom: 2px; }}
-        .list-unit:last-child {{ border-bottom: none; }}
-        .word-small {{ font-weight: bold; color: #444; }}
-        .trans-small {{ color: var(--text-sub); font-size: 0.85em; margin-left: 5px; }}
-
-        @media (max-width: 600px) {{ .info-grid {{ grid-template-columns: 1fr; }} .word-title {{ font-size: 2.2rem; }} }}
-    </style>
+    <link rel="stylesheet" href="../assets/{stylesheet:attr}">
 </head>
-<body>
+<body class="word-page">
 
     <a href="../index.html" class="back-link">← 一覧へ戻る</a>
 
@@ -104,6 +132,7 @@ HTML_TEMPLATE_MAIN = """<!DOCTYPE html>
         </div>
     </div>
 
+<script src="../sw-register.js"></script>
 </body>
 </html>"""
 
@@ -114,57 +143,9 @@ HTML_TEMPLATE_SUB = """<!DOCTYPE html>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{number} {word}</title>
-    <style>
-        :root {{ --primary-color: #28a745; --accent-color: #f4faf6; --text-main: #333; --text-sub: #666; }}
-        body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; line-height: 1.7; color: var(--text-main); max-width: 700px; margin: 0 auto; padding: 30px 20px; background-color: #f0f2f5; }}
-        .card {{ background: white; padding: 40px; border-radius: 16px; box-shadow: 0 4px 20px rgba(0,0,0,0.08); }}
-        
-        /* ナビゲーション */
-        .nav-buttons {{ display: flex; justify-content: space-between; margin-bottom: 20px; gap: 10px; }}
-        .nav-button {{ flex: 1; padding: 12px 20px; border: 2px solid var(--primary-color); background: white; color: var(--primary-color); text-decoration: none; border-radius: 8px; font-weight: bold; text-align: center; transition: 0.3s; cursor: pointer; }}
-        .nav-button:hover:not(.disabled) {{ background: var(--primary-color); color: white; }}
-        .nav-button.disabled {{ opacity: 0.3; cursor: not-allowed; border-color: #ccc; color: #ccc; }}
-        
-        /* ヘッダー部分 */
-        .back-link {{ display: inline-block; margin-bottom: 25px; text-decoration: none; color: var(--primary-color); font-weight: bold; }}
-        .word-header {{ border-bottom: 3px solid var(--primary-color); padding-bottom: 15px; margin-bottom: 25px; }}
-        .word-number {{ font-size: 1rem; color: var(--text-sub); font-weight: bold; }}
-        .word-title {{ font-size: 3rem; margin: 5px 0; letter-spacing: 1px; }}
-        .pos-tag {{ display: inline-block; background: var(--primary-color); color: white; padding: 2px 12px; border-radius: 20px; font-size: 0.85rem; vertical-align: middle; margin-left: 10px; }}
-
-        /* コンテンツ部分 */
-        .section-title {{ font-size: 1.1rem; font-weight: bold; color: var(--primary-color); margin-top: 25px; margin-bottom: 10px; display: flex; align-items: center; }}
-        .section-title::before {{ content: ""; display: inline-block; width: 4px; height: 18px; background: var(--primary-color); margin-right: 10px; border-radius: 2px; }}
-        
-        .meaning-jp {{ 
-            font-size: 1.5rem; 
-            font-weight: bold; 
-            display: block;
-            margin-bottom: 15px; 
-            padding: 10px 0;
-            color: var(--text-main);
-            background: transparent;
-        }}
-        .nuance-box {{ background: var(--accent-color); padding: 15px; border-radius: 8px; font-size: 0.95rem; border: 1px dashed var(--primary-color); }}
-
-        /* 例文 */
-        .example-item {{ margin-bottom: 15px; padding-left: 15px; border-left: 3px solid #ddd; }}
-        .en {{ display: block; font-weight: 500; color: #444; }}
-        .ja {{ display: block; color: var(--text-sub); font-size: 0.9rem; }}
-
-        /* リスト */
-        .info-grid {{ display: grid; grid-template-columns: 1fr 1fr; gap: 20px; margin-top: 20px; }}
-        .info-item {{ background: #f8f9fa; padding: 12px; border-radius: 8px; font-size: 0.9rem; }}
-        .info-label {{ display: block; font-weight: bold; color: var(--text-sub); font-size: 0.8rem; text-transform: uppercase; margin-bottom: 5px; }}
-        .list-unit {{ margin-bottom: 4px; border-bottom: 1px solid #eee; padding-bottom: 2px; }}
-        .list-unit:last-child {{ border-bottom: none; }}
-        .word-small {{ font-weight: bold; color: #444; }}
-        .trans-small {{ color: var(--text-sub); font-size: 0.85em; margin-left: 5px; }}
-
-        @media (max-width: 600px) {{ .info-grid {{ grid-template-columns: 1fr; }} .word-title {{ font-size: 2.2rem; }} }}
-    </style>
+    <link rel="stylesheet" href="../assets/{stylesheet:attr}">
 </head>
-<body>
+<body class="word-page word-page--sub">
 
     <a href="../index.html" class="back-link">← 一覧へ戻る</a>
 
@@ -207,195 +188,370 @@ HTML_TEMPLATE_SUB = """<!DOCTYPE html>
         </div>
     </div>
 
+<script src="../sw-register.js"></script>
 </body>
 </html>"""
 
-
-def load_all_vocabulary_files():
-    """vocabulary_data*.jsonファイルをすべて読み込んで統合"""
-    all_words = []
-    
-    # vocabulary_data.json と vocabulary_data_N.json の両方を取得
-    json_files = []
-    
-    # まず vocabulary_data.json を確認
-    if os.path.exists('vocabulary_data.json'):
-        json_files.append('vocabulary_data.json')
-    
-    # 次に vocabulary_data_N.json を取得（数字順にソート）
-    numbered_files = sorted(glob('vocabulary_data_*.json'), 
-                           key=lambda x: int(re.search(r'_(\d+)\.json', x).group(1)))
-    json_files.extend(numbered_files)
-    
-    if not json_files:
-        print("エラー: vocabulary_data.json または vocabulary_data_*.json が見つかりません")
-        return []
-    
-    print(f"\n読み込むJSONファイル: {len(json_files)}件")
-    for json_file in json_files:
-        print(f"  - {json_file}")
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                words = data.get('words', [])
-                all_words.extend(words)
-                print(f"    → {len(words)}個の単語を読み込み")
-        except Exception as e:
-            print(f"    ⚠ エラー: {e}")
-    
-    print(f"\n合計: {len(all_words)}個の単語を統合")
-    return all_words
-
-
-def parse_number(number_str):
-    """番号文字列をパース (例: "422" -> (422, 0), "422-2" -> (422, 2))"""
-    parts = str(number_str).split('-')
-    main_num = int(parts[0])
-    sub_num = int(parts[1]) if len(parts) > 1 else 0
-    return (main_num, sub_num)
-
-
-def sort_words_by_number(words):
-    """単語をメイン→サブの順番でソート"""
-    return sorted(words, key=lambda w: parse_number(w['number']))
-
-
-def get_filename(word_data):
-    """ファイル名を生成"""
-    number = str(word_data['number'])
-    word = word_data['word']
-    return f"{number}-{word}.html"
-
-
-def generate_nav_buttons(current_index, sorted_words):
+# 起動時に一度だけコンパイルしておく（固定部分と差し込み口に分解）
+PAGE_TEMPLATE_MAIN = Template(HTML_TEMPLATE_MAIN)
+PAGE_TEMPLATE_SUB = Template(HTML_TEMPLATE_SUB)
+NAV_LINK = Template('<a href="{href:attr}" class="nav-button">{label}</a>')
+NAV_DISABLED = Template('<span class="nav-button disabled">{label}</span>')
+SECTION_TITLE = Template('        <div class="section-title">{title}</div>\n')
+EXAMPLE_ITEM = Template('''        <div class="example-item">
+            <span class="en">{en}</span>
+            <span class="ja">{ja}</span>
+        </div>\n''')
+LINKED_WORD = Template('''                <a href="{link:attr}" style="text-decoration: none;">
+                    <span class="word-small" style="color: {color:attr};">{word}</span>
+                    <span class="trans-small">({trans})</span>
+                </a>\n''')
+PLAIN_WORD = Template('                <div class="list-unit"><span class="word-small">{word}</span><span class="trans-small">({trans})</span></div>\n')
+
+
+def get_stylesheet_filename():
+    """共通スタイルシートのファイル名（内容が変われば名前も変わるので長期キャッシュできる）"""
+    digest = hashlib.sha256(WORD_PAGE_CSS.encode('utf-8')).hexdigest()[:12]
+    return f"word.{digest}.css"
+
+
+def write_stylesheet():
+    """共通スタイルシートを書き出し、古いハッシュ名のものを削除"""
+    filename = get_stylesheet_filename()
+    write_if_changed(STYLESHEET_DIR / filename, WORD_PAGE_CSS)
+    remove_stale_files(STYLESHEET_DIR, {filename}, 'word.*.css')
+    return filename
+
+
+def minify_html(html):
+    """タグ間の空白と行頭のインデントを詰める（テキスト内の空白はそのまま）"""
+    html = re.sub(r'>\s+<', '><', html)
+    return re.sub(r'\n\s*', '\n', html).strip()
+
+
+def iter_with_neighbors(words):
+    """(前のファイル名, 単語, 次のファイル名) を順に返す。保持するのは前後1語分だけなので、
+    リストでもストリーミングのジェネレーターでも使える"""
+    iterator = iter(words)
+    prev_filename = None
+    current = next(iterator, None)
+    while current is not None:
+        following = next(iterator, None)
+        next_filename = get_filename(following) if following is not None else None
+        yield prev_filename, current, next_filename
+        prev_filename = get_filename(current)
+        current = following
+
+
+def generate_nav_buttons(prev_filename, next_filename):
     """ナビゲーションボタンを生成"""
     # 前の単語
-    if current_index > 0:
-        prev_word = sorted_words[current_index - 1]
-        prev_filename = get_filename(prev_word)
-        prev_button = f'<a href="{prev_filename}" class="nav-button">← 前の単語</a>'
+    if prev_filename:
+        prev_button = NAV_LINK.render(href=prev_filename, label='← 前の単語')
     else:
-        prev_button = '<span class="nav-button disabled">← 前の単語</span>'
+        prev_button = NAV_DISABLED.render(label='← 前の単語')
     
     # 次の単語
-    if current_index < len(sorted_words) - 1:
-        next_word = sorted_words[current_index + 1]
-        next_filename = get_filename(next_word)
-        next_button = f'<a href="{next_filename}" class="nav-button">次の単語 →</a>'
+    if next_filename:
+        next_button = NAV_LINK.render(href=next_filename, label='次の単語 →')
     else:
-        next_button = '<span class="nav-button disabled">次の単語 →</span>'
+        next_button = NAV_DISABLED.render(label='次の単語 →')
     
-    return prev_button, next_button
+    return Markup(prev_button), Markup(next_button)
 
 
-def generate_example_section(section_title, examples):
-    """例文セクションを生成"""
-    html = f'        <div class="section-title">{section_title}</div>\n'
+def highlight_example(ex):
+    """英文中の highlight を <strong> で囲む（エスケープしてから置き換える）"""
+    en = escape(ex.en)
+    if ex.highlight:
+        highlight = escape(ex.highlight)
+        en = en.replace(highlight, f"<strong>{highlight}</strong>")
+    return Markup(en)
+
+
+def generate_example_section(section_title, examples, out):
+    """例文セクションを out に出力"""
+    SECTION_TITLE.render_into(out, {'title': section_title})
     for ex in examples:
-        en = ex['en'].replace(ex.get('highlight', ''), f"<strong>{ex.get('highlight', '')}</strong>")
-        html += f'''        <div class="example-item">
-            <span class="en">{en}</span>
-            <span class="ja">{ex['ja']}</span>
-        </div>\n'''
-    return html
+        EXAMPLE_ITEM.render_into(out, {'en': highlight_example(ex), 'ja': ex.ja})
+    return out
 
 
-def generate_word_list(words, is_sub_word=False, main_number=None):
-    """単語リストを生成（サブ単語の場合はリンク付き）"""
-    html = ""
-    for w in words:
-        if 'link' in w and w['link']:
-            # リンク付きの関連語（メイン単語へのリンク）
+def generate_word_list(words, links, is_sub_word=False, main_number=None):
+    """単語リストの出力片を生成（links は各項目のリンク先。ページがある語はリンク付き）"""
+    out = []
+    for w, link in zip(words, links):
+        if link:
+            # リンク付きの関連語（その単語のページへのリンク）
             color = '#28a745' if is_sub_word else '#2c3e50'
-            html += f'''                <a href="{w['link']}" style="text-decoration: none;">
-                    <span class="word-small" style="color: {color};">{w["word"]}</span>
-                    <span class="trans-small">({w["trans"]})</span>
-                </a>\n'''
+            LINKED_WORD.render_into(out, {'link': link, 'color': color, 'word': w.word, 'trans': w.trans})
         else:
             # 通常の単語
-            html += f'                <div class="list-unit"><span class="word-small">{w["word"]}</span><span class="trans-small">({w["trans"]})</span></div>\n'
-    return html
+            PLAIN_WORD.render_into(out, {'word': w.word, 'trans': w.trans})
+    return out
 
 
-def generate_html(data, current_index, sorted_words):
-    """JSONデータからHTMLを生成"""
-    
-    # 番号に "-" が含まれているかチェック（例: 422-2）
-    is_sub_word = '-' in str(data['number'])
-    template = HTML_TEMPLATE_SUB if is_sub_word else HTML_TEMPLATE_MAIN
+def get_page_values(data, prev_filename, next_filename, links=None, stylesheet=None):
+    """ページテンプレートに差し込む値（例文・単語リストは描画済みの出力片のリスト）。
+    links は crossref.resolve_word_links の結果（省略時は手書きの link だけを使う）。
+    stylesheet は共通スタイルシートのファイル名（generate_pages で一度だけ求めて渡す。省略時はここで計算）"""
+    is_sub_word = data.is_sub
+    if links is None:
+        links = tuple(tuple(ref.link for ref in refs) for refs in (data.synonyms, data.antonyms, data.related))
     
     # ナビゲーションボタンを生成
-    prev_button, next_button = generate_nav_buttons(current_index, sorted_words)
+    prev_button, next_button = generate_nav_buttons(prev_filename, next_filename)
     
     # メイン番号を取得（サブ単語の場合）
-    main_number = str(data['number']).split('-')[0] if is_sub_word else None
+    main_number = str(data.main_number) if is_sub_word else None
     
     # 例文セクションを生成
-    examples_sections = ""
-    if 'example_sections' in data:
-        for section in data['example_sections']:
-            examples_sections += generate_example_section(section['title'], section['examples'])
-    else:
-        # 例文セクションがない場合はデフォルトで「例文」として処理
-        examples_sections = generate_example_section('例文', data.get('examples', []))
+    examples_sections = []
+    for section in data.sections:
+        generate_example_section(section.title, section.examples, examples_sections)
     
     # 単語リストを生成
-    synonyms = generate_word_list(data.get('synonyms', []), is_sub_word, main_number)
-    antonyms = generate_word_list(data.get('antonyms', []), is_sub_word, main_number)
-    related = generate_word_list(data.get('related', []), is_sub_word, main_number)
+    synonyms = generate_word_list(data.synonyms, links[0], is_sub_word, main_number)
+    antonyms = generate_word_list(data.antonyms, links[1], is_sub_word, main_number)
+    related = generate_word_list(data.related, links[2], is_sub_word, main_number)
+    
+    # 値のエスケープはテンプレート側で行う（語源は <br> だけ許可）
+    return {
+        'number': data.number,
+        'word': data.word,
+        'pos': data.pos,
+        'meaning': data.meaning,
+        'nuance': data.nuance,
+        'examples_sections': examples_sections,
+        'etymology': allow_breaks(data.etymology) if data.etymology is not None else '不明または未記載',
+        'synonyms': synonyms,
+        'antonyms': antonyms,
+        'related': related,
+        'prev_button': prev_button,
+        'next_button': next_button,
+        'stylesheet': stylesheet or get_stylesheet_filename(),
+    }
+
+
+def render_page(data, prev_filename, next_filename, links=None, stylesheet=None):
+    """単語データ（models.Word）からページの出力片（文字列のリスト）を生成"""
+    # サブ単語（例: 422-2）は緑系のテンプレート
+    template = PAGE_TEMPLATE_SUB if data.is_sub else PAGE_TEMPLATE_MAIN
+    return template.render_into([], get_page_values(data, prev_filename, next_filename, links, stylesheet))
+
+
+def generate_html(data, prev_filename, next_filename, links=None):
+    """単語データ（models.Word）からHTMLを生成"""
+    return ''.join(render_page(data, prev_filename, next_filename, links))
+
+
+def get_generator_hash(minify=False):
+    """生成ロジック（このファイル・テンプレートエンジン・単語モデル・リンク解決）と出力オプションのハッシュ。
+    テンプレートや処理が変われば全ページ再生成"""
+    source = b''.join(Path(path).read_bytes() for path in (__file__, templating.__file__, models.__file__, crossref.__file__))
+    source += b'\0minify' if minify else b''
+    return hashlib.sha256(source).hexdigest()
+
+
+def compute_page_digest(word_data, prev_filename, next_filename, links):
+    """ページの入力（単語データのハッシュ＋前後リンク＋類義語などのリンク先）からハッシュを計算。
+    リンク先は他の単語の追加・削除でも変わるので、ここに含めて再生成の対象にする"""
+    resolved = '\1'.join(link or '' for field_links in links for link in field_links)
+    payload = '\0'.join([word_data.digest, prev_filename or '', next_filename or '', resolved])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_manifest(generator_hash):
+    """前回のマニフェストを読み込む（生成ロジックが変わっていれば空を返す）"""
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('generator') != generator_hash:
+        return {}
+    return manifest.get('pages', {})
+
+
+def save_manifest(generator_hash, pages):
+    """マニフェストを保存"""
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'generator': generator_hash,
+        'pages': dict(sorted(pages.items())),
+    }
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+        f.write('\n')
+
+
+def remove_stale_pages(data_dir, current_filenames):
+    """現在の単語に対応しない古いHTMLファイルを削除"""
+    removed = []
+    for path in sorted(data_dir.glob('*.html')):
+        if path.name not in current_filenames:
+            path.unlink()
+            removed.append(path)
+    return removed
+
+
+def write_page(task):
+    """1ページ分を生成して保存し、(ログ用メッセージ, 生成秒数, 書き込み秒数, バイト数) を返す"""
+    word_data, prev_filename, next_filename, links, filepath, minify, stylesheet = task
+    started = time.perf_counter()
+    parts = render_page(word_data, prev_filename, next_filename, links, stylesheet)
+    if minify:
+        parts = [minify_html(''.join(parts))]
+    rendered = time.perf_counter()
     
-    # HTMLを生成
-    html = template.format(
-        number=data['number'],
-        word=data['word'],
-        pos=data['pos'],
-        meaning=data['meaning'],
-        nuance=data['nuance'],
-        examples_sections=examples_sections,
-        etymology=data.get('etymology', '不明または未記載'),
-        synonyms=synonyms,
-        antonyms=antonyms,
-        related=related,
-        prev_button=prev_button,
-        next_button=next_button
-    )
+    # 出力片をそのままファイルへ書き出す（1つの文字列に連結しない）
+    with open(filepath, 'w', encoding='utf-8', newline='') as f:
+        f.writelines(parts)
+        size = f.tell()
     
-    return html
+    word_type = "サブ単語" if word_data.is_sub else "メイン単語"
+    message = f"✓ 生成完了 [{word_type}]: {filepath}"
+    return message, rendered - started, time.perf_counter() - rendered, size
 
 
-def main():
-    """メイン処理"""
-    # すべてのJSONファイルを読み込んで統合
-    all_words = load_all_vocabulary_files()
-    
-    if not all_words:
+def write_pages(tasks):
+    """ワーカープロセス用: 担当スライスのページをまとめて生成"""
+    return [write_page(task) for task in tasks]
+
+
+def iter_batches(iterable, size):
+    """iterable を size 件ずつのリストに区切って返す"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def run_page_tasks(tasks, jobs):
+    """タスクを順に処理して結果を返すジェネレーター。
+    jobs > 1 ならバッチに分けてワーカーに渡し、処理中のバッチ数を抑えてメモリを一定に保つ"""
+    if jobs <= 1:
+        yield from map(write_page, tasks)
         return
-    
-    # 単語をソート（メイン→サブの順）
-    sorted_words = sort_words_by_number(all_words)
-    
+    batches = iter_batches(tasks, PAGE_BATCH_SIZE)
+    first = next(batches, None)
+    if first is None:
+        return
+    if len(first) < PAGE_BATCH_SIZE:
+        # 変更が少ないときはプロセスを起動するほうが遅い
+        yield from map(write_page, first)
+        return
+    # build.py では他のステージがスレッドで並行して動くので、fork ではなく spawn でワーカーを起動する
+    # （fork だと他のスレッドが持っていたロックを子プロセスが引き継いで止まることがある）
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn')) as executor:
+        pending = deque([executor.submit(write_pages, first)])
+        for batch in batches:
+            pending.append(executor.submit(write_pages, batch))
+            if len(pending) >= jobs * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def iter_page_tasks(words, data_dir, previous_pages, current_pages, minify, stylesheet, headword_index, dangling):
+    """入力が変わったページだけをタスクとして返す（前後のファイル名とリンク先もここで確定させる）。
+    current_pages には全ページのファイル名とハッシュを、dangling にはリンク切れを記録していく"""
+    for prev_filename, word_data, next_filename in iter_with_neighbors(words):
+        # ファイル名を生成
+        filename = get_filename(word_data)
+        filepath = data_dir / filename
+        
+        links = resolve_word_links(word_data, headword_index)
+        dangling += find_dangling_links((word_data,), headword_index)
+        digest = compute_page_digest(word_data, prev_filename, next_filename, links)
+        current_pages[filename] = digest
+        if previous_pages.get(filename) == digest and filepath.exists():
+            continue
+        yield (word_data, prev_filename, next_filename, links, filepath, minify, stylesheet)
+
+
+def generate_pages(sorted_words, force=False, jobs=1, minify=False, quiet=False, headword_index=None):
+    """番号順の単語（リストまたはジェネレーター）から data/*.html を生成（入力が変わったページのみ）。
+    単語は1語ずつ流れるので、ジェネレーターを渡せばコーパス全体をメモリに載せずに済む
+    （その場合は見出し語の索引 headword_index を別に作って渡す）。
+    quiet=True のときはページごとのログを出さない"""
+    if headword_index is None:
+        headword_index = build_headword_index(sorted_words)
     # dataディレクトリを作成
     data_dir = Path('data')
     data_dir.mkdir(exist_ok=True)
+    stylesheet = write_stylesheet()
+    print(f"🎨 共通スタイルシート: {STYLESHEET_DIR / stylesheet}")
+    
+    # 前回のマニフェストを読み込み（--force の場合は全件再生成）
+    generator_hash = get_generator_hash(minify)
+    previous_pages = {} if force else load_manifest(generator_hash)
+    current_pages = {}
     
     print(f"\nHTML生成開始...")
-    # 各単語のHTMLファイルを生成
-    for index, word_data in enumerate(sorted_words):
-        html_content = generate_html(word_data, index, sorted_words)
-        
-        # ファイル名を生成
-        filename = get_filename(word_data)
-        filepath = data_dir / filename
-        
-        # HTMLファイルを保存
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        word_type = "サブ単語" if '-' in str(word_data['number']) else "メイン単語"
-        print(f"✓ 生成完了 [{word_type}]: {filepath}")
+    dangling = []
+    tasks = iter_page_tasks(sorted_words, data_dir, previous_pages, current_pages, minify, stylesheet,
+                            headword_index, dangling)
+    generated = render_time = write_time = written_bytes = 0
+    for message, render_seconds, write_seconds, size in run_page_tasks(tasks, jobs):
+        if not quiet:
+            print(message)
+        generated += 1
+        render_time += render_seconds
+        write_time += write_seconds
+        written_bytes += size
+    # 並列実行時はワーカーの合計時間（CPU時間に近い値）になる
+    metrics.add_phase('render', render_time, files=generated)
+    metrics.add_phase('write', write_time, bytes_written=written_bytes, files_written=generated)
+    metrics.add_io(bytes_written=written_bytes, files_written=generated)
+    
+    # 削除された単語の古いページを掃除
+    for path in remove_stale_pages(data_dir, current_pages):
+        if not quiet:
+            print(f"🗑 削除: {path}")
+    
+    save_manifest(generator_hash, current_pages)
+    print_dangling_links(dangling)
+    
+    total = len(current_pages)
+    print(f"\n✅ 合計 {total} 件（生成 {generated} 件 / 変更なし {total - generated} 件）")
+
+
+def main(force=False, jobs=1, minify=False, quiet=False, stream=False):
+    """メイン処理"""
+    if stream:
+        # ファイルを少しずつ読み、番号順に1語ずつ流して生成する（単語データをまとめてメモリに載せない）。
+        # 1回目の読み込みで見出し語の索引とソート済みランを作り、2回目は各語をその位置から読み直して描画する。
+        # 索引・ラン・マニフェストは語数に比例する（1語あたり番号とファイル名程度）
+        json_files = list_vocabulary_files()
+        runs = []
+        headword_index = build_headword_index(iter_run_words(json_files, runs))
+        generate_pages(iter_sorted_words(json_files, runs), force=force, jobs=jobs, minify=minify, quiet=quiet,
+                       headword_index=headword_index)
+        return
+    
+    # すべてのJSONファイルを読み込んで統合し、メイン→サブの順にソート
+    sorted_words = load_sorted_words(verbose=not quiet)
+    
+    if not sorted_words:
+        return
     
-    print(f"\n✅ 合計 {len(sorted_words)} 件のHTMLファイルを生成しました。")
+    generate_pages(sorted_words, force=force, jobs=jobs, minify=minify, quiet=quiet)
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='vocabulary_data*.json から単語ページを生成')
+    parser.add_argument('--force', action='store_true', help='マニフェストを無視して全ページを再生成')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='並列に生成するワーカープロセス数（0 でCPUコア数）')
+    parser.add_argument('--minify', action='store_true', help='ページのHTMLからタグ間の空白を取り除く')
+    parser.add_argument('--quiet', '-q', action='store_true', help='ファイルごとのログを出さない')
+    parser.add_argument('--stream', action='store_true',
+                        help='コーパスをまとめて読み込まず、ファイルから1語ずつ番号順に流して生成する'
+                             '（JSON を2回読む。見出し語の索引などは語数に比例して残る）')
+    args = parser.parse_args()
+    try:
+        main(force=args.force, jobs=args.jobs or os.cpu_count() or 1, minify=args.minify, quiet=args.quiet,
+             stream=args.stream)
+    except CorpusError as e:
+        # 読み込めなかったファイルの単語ページを古いページとして消さないよう、何も書き換えずに終了する
+        sys.exit(f"❌ {e}")
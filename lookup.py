@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import re
+import sys
+
+from dictionary import DICTIONARY_PATH, Dictionary
+
+# dictionary.bin から単語を引く CLI。JSON は読まないので、コーパスの大きさによらず1語数ミリ秒で返る。
+#   python lookup.py complex            見出し語で引く（同じ見出し語はすべて）
+#   python lookup.py 422-2              番号で引く
+#   python lookup.py --prefix comp      前方一致（補完用）
+#   ... | python lookup.py -            標準入力から1行1語で引く
+
+NUMBER_RE = re.compile(r'\d+(-\d+)?')
+
+
+def lookup(dictionary, query, prefix=False, limit=20):
+    """番号の形なら番号で、それ以外は見出し語で引いたレコードのリスト"""
+    if NUMBER_RE.fullmatch(query):
+        record = dictionary.find_number(query)
+        return [record] if record else []
+    if prefix:
+        return dictionary.find_prefix(query, limit)
+    return dictionary.find_word(query)
+
+
+def format_record(record):
+    """番号・見出し語・品詞・意味のタブ区切り（パイプで扱いやすい形）"""
+    meaning = ' '.join(record['meaning'].split())
+    return f"{record['number']}\t{record['word']}\t{record['pos']}\t{meaning}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='dictionary.bin から単語を引く（見出し語または番号）')
+    parser.add_argument('queries', nargs='+', help='見出し語・番号（- で標準入力から1行ずつ）')
+    parser.add_argument('--prefix', action='store_true', help='見出し語の前方一致で引く')
+    parser.add_argument('--limit', type=int, default=20, help='--prefix のときの最大件数')
+    parser.add_argument('--json', action='store_true', help='レコード全体を1行1件の JSON で出力')
+    parser.add_argument('--dictionary', default=DICTIONARY_PATH, help='辞書ファイルのパス')
+    args = parser.parse_args()
+
+    try:
+        dictionary = Dictionary(args.dictionary)
+    except FileNotFoundError:
+        sys.exit(f"{args.dictionary} がありません。python build.py dictionary で作成してください")
+    except ValueError as e:
+        sys.exit(str(e))
+
+    queries = args.queries
+    if queries == ['-']:
+        queries = (line.strip() for line in sys.stdin)
+    missing = 0
+    try:
+        with dictionary:
+            for query in queries:
+                if not query:
+                    continue
+                records = lookup(dictionary, query, args.prefix, args.limit)
+                if not records:
+                    missing += 1
+                    print(f"見つかりません: {query}", file=sys.stderr)
+                for record in records:
+                    print(json.dumps(record, ensure_ascii=False) if args.json else format_record(record))
+            sys.stdout.flush()
+    except BrokenPipeError:
+        # 出力先（head など）が先に閉じたら黙って終える。終了時の flush でもう一度失敗しないよう
+        # 標準出力は /dev/null に付け替える
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    # 1件でも見つからなければ終了コード 1（スクリプトから判定できるように）
+    sys.exit(1 if missing else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+# ビルドの計測値（--profile / --metrics-out のときだけ有効）。
+# ステージを並行実行すると区間が重なるので、計測時はステージを1つずつ実行する
+METRICS_VERSION = 1
+
+_enabled = False
+_records = []
+_stack = []
+_io = {'bytes_read': 0, 'bytes_written': 0, 'files_read': 0, 'files_written': 0}
+
+
+def enable(trace_memory=True):
+    """計測を有効にする（trace_memory=True で tracemalloc のピークも取る）"""
+    global _enabled
+    _enabled = True
+    _records.clear()
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def is_enabled():
+    return _enabled
+
+
+def add_io(bytes_read=0, bytes_written=0, files_read=0, files_written=0):
+    """読み書きしたバイト数・ファイル数を加算（計測していないときは何もしない）"""
+    if not _enabled:
+        return
+    _io['bytes_read'] += bytes_read
+    _io['bytes_written'] += bytes_written
+    _io['files_read'] += files_read
+    _io['files_written'] += files_written
+
+
+def add_phase(name, wall, cpu=None, **extra):
+    """別プロセスなどで測った区間を記録に加える（ページ生成の render / write など）"""
+    if not _enabled:
+        return
+    record = {'name': '.'.join([frame['name'] for frame in _stack] + [name]), 'wall': round(wall, 6)}
+    if cpu is not None:
+        record['cpu'] = round(cpu, 6)
+    record.update(extra)
+    _records.append(record)
+
+
+@contextmanager
+def measure(name):
+    """with measure('load'): ... の区間の経過時間・CPU時間・I/O・メモリのピークを記録する。
+    入れ子にすると 'load.sort' のような名前になる"""
+    if not _enabled:
+        yield None
+        return
+
+    full_name = '.'.join([frame['name'] for frame in _stack] + [name])
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        # 外側の区間のピークを退避してから、この区間用にリセット
+        if _stack:
+            _stack[-1]['peak'] = max(_stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    frame = {'name': name, 'peak': 0}
+    _stack.append(frame)
+    io_before = dict(_io)
+    record = {'name': full_name}
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    try:
+        yield record
+    finally:
+        record['wall'] = round(time.perf_counter() - started, 6)
+        record['cpu'] = round(time.process_time() - cpu_started, 6)
+        for key, value in _io.items():
+            record[key] = value - io_before[key]
+        _stack.pop()
+        if tracing:
+            peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            record['tracemalloc_peak'] = peak
+            if _stack:
+                _stack[-1]['peak'] = max(_stack[-1]['peak'], peak)
+        _records.append(record)
+
+
+def report():
+    """記録した区間（終了順）と I/O の合計を JSON にそのまま書ける dict で返す"""
+    return {'version': METRICS_VERSION, 'records': list(_records), 'totals': dict(_io)}
+
+
+def write_report(path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report(), f, ensure_ascii=False, indent=1)
+        f.write('\n')
+
+
+def print_summary():
+    """区間ごとの計測値を表形式で表示"""
+    print(f"\n{'区間':<24}{'経過(s)':>10}{'CPU(s)':>10}{'書込(KB)':>12}{'書込数':>8}{'ピーク(MB)':>12}")
+    for r in _records:
+        peak = r.get('tracemalloc_peak')
+        peak_text = f"{peak / 1024 / 1024:.1f}" if peak is not None else '-'
+        cpu = r.get('cpu')
+        cpu_text = f"{cpu:.3f}" if cpu is not None else '-'
+        print(f"{r['name']:<24}{r['wall']:>10.3f}{cpu_text:>10}"
+              f"{r.get('bytes_written', 0) / 1024:>12.1f}{r.get('files_written', 0):>8}{peak_text:>12}")
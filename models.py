@@ -0,0 +1,177 @@
+import hashlib
+import json
+import re
+import sys
+import unicodedata
+
+
+# 単語データのモデル。JSON の dict をそのまま持ち回らず、読み込み時に一度だけ変換する。
+# __slots__ で属性辞書を持たないので1語あたりのメモリが小さく、属性アクセスも dict より速い。
+
+# 例文セクションが無い古い形式のデータに付けるタイトル
+DEFAULT_SECTION_TITLE = '例文'
+WHITESPACE_RE = re.compile(r'\s+')
+# 品詞の区切り（「名詞、他動詞」「名詞/形容詞」など）
+POS_SPLIT_RE = re.compile(r'[、/・,，\s]+')
+
+
+def parse_number(number_str):
+    """番号文字列をパース (例: "422" -> (422, 0), "422-2" -> (422, 2))"""
+    parts = str(number_str).split('-')
+    main_num = int(parts[0])
+    sub_num = int(parts[1]) if len(parts) > 1 else 0
+    return (main_num, sub_num)
+
+
+def normalize_headword(text):
+    """見出し語の比較用キー（NFKC 正規化・小文字化・空白の連続を1つに）"""
+    return WHITESPACE_RE.sub(' ', unicodedata.normalize('NFKC', text).lower()).strip()
+
+
+def split_pos(pos):
+    """品詞を (まとめた品詞, 元の表記) に分ける。他動詞・自動詞は「動詞」にまとめる
+    （「名詞、他動詞」→ [(名詞, 名詞), (動詞, 他動詞)]）"""
+    return [(part.replace('他動詞', '動詞').replace('自動詞', '動詞'), part)
+            for part in POS_SPLIT_RE.split(pos) if part]
+
+
+def get_filename(word_data):
+    """単語ページのファイル名（例: 1-complexity.html, 1-2-complex.html）"""
+    return f"{word_data.number}-{word_data.word}.html"
+
+
+class WordRef:
+    """類義語・反意語・関連語の1項目（link は手書きのページへのリンク）"""
+    __slots__ = ('word', 'trans', 'link')
+
+    def __init__(self, word, trans, link=None):
+        self.word = word
+        self.trans = trans
+        self.link = link
+
+    def __reduce__(self):
+        return (WordRef, (self.word, self.trans, self.link))
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d.get('word', ''), d.get('trans', ''), d.get('link') or None)
+
+    def to_dict(self):
+        d = {'word': self.word, 'trans': self.trans}
+        if self.link:
+            d['link'] = self.link
+        return d
+
+
+class Example:
+    """例文1つ（highlight は英文中で強調する語）"""
+    __slots__ = ('en', 'ja', 'highlight')
+
+    def __init__(self, en, ja, highlight=''):
+        self.en = en
+        self.ja = ja
+        self.highlight = highlight
+
+    def __reduce__(self):
+        return (Example, (self.en, self.ja, self.highlight))
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d.get('en', ''), d.get('ja', ''), d.get('highlight') or '')
+
+    def to_dict(self):
+        d = {'en': self.en, 'ja': self.ja}
+        if self.highlight:
+            d['highlight'] = self.highlight
+        return d
+
+
+class ExampleSection:
+    """見出し付きの例文のまとまり（「例文（名詞）」など）"""
+    __slots__ = ('title', 'examples')
+
+    def __init__(self, title, examples):
+        self.title = title
+        self.examples = examples
+
+    def __reduce__(self):
+        return (ExampleSection, (self.title, self.examples))
+
+    @classmethod
+    def from_dict(cls, d):
+        # 見出しは数百種類しかないので intern して共有する
+        return cls(sys.intern(d.get('title', DEFAULT_SECTION_TITLE)),
+                   tuple(Example.from_dict(ex) for ex in d.get('examples', ())))
+
+    def to_dict(self):
+        return {'title': self.title, 'examples': [ex.to_dict() for ex in self.examples]}
+
+
+class Word:
+    """1語分のデータ。番号は (メイン, サブ) に一度だけ分解して key に持つ。
+    digest は元の JSON の内容ハッシュ（増分ビルドの判定に使う）"""
+    __slots__ = ('number', 'key', 'is_sub', 'word', 'pos', 'meaning', 'nuance', 'etymology',
+                 'sections', 'synonyms', 'antonyms', 'related', 'digest')
+
+    def __init__(self, number, word, pos, meaning, nuance, etymology, sections,
+                 synonyms, antonyms, related, digest, key=None, is_sub=None):
+        self.number = number
+        self.key = key if key is not None else parse_number(number)
+        # 番号に "-" が含まれていればサブ単語（例: 422-2）
+        self.is_sub = is_sub if is_sub is not None else '-' in str(number)
+        self.word = word
+        self.pos = pos
+        self.meaning = meaning
+        self.nuance = nuance
+        self.etymology = etymology
+        self.sections = sections
+        self.synonyms = synonyms
+        self.antonyms = antonyms
+        self.related = related
+        self.digest = digest
+
+    def __reduce__(self):
+        return (Word, (self.number, self.word, self.pos, self.meaning, self.nuance, self.etymology,
+                       self.sections, self.synonyms, self.antonyms, self.related, self.digest,
+                       self.key, self.is_sub))
+
+    def __repr__(self):
+        return f"Word({self.number!r}, {self.word!r})"
+
+    @property
+    def main_number(self):
+        return self.key[0]
+
+    @classmethod
+    def from_dict(cls, d):
+        """vocabulary_data*.json の1要素から作る"""
+        payload = json.dumps(d, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        if 'example_sections' in d:
+            sections = tuple(ExampleSection.from_dict(s) for s in d['example_sections'])
+        else:
+            # 例文セクションが無い場合はデフォルトで「例文」として扱う
+            sections = (ExampleSection.from_dict({'examples': d.get('examples', [])}),)
+        return cls(
+            number=d['number'],
+            word=d['word'],
+            pos=sys.intern(d.get('pos', '')),
+            meaning=d.get('meaning', ''),
+            nuance=d.get('nuance', ''),
+            etymology=d.get('etymology'),
+            sections=sections,
+            synonyms=tuple(WordRef.from_dict(r) for r in d.get('synonyms', ())),
+            antonyms=tuple(WordRef.from_dict(r) for r in d.get('antonyms', ())),
+            related=tuple(WordRef.from_dict(r) for r in d.get('related', ())),
+            digest=hashlib.sha256(payload.encode('utf-8')).hexdigest(),
+        )
+
+    def to_dict(self):
+        """JSON に戻した形（例文は常に example_sections 形式）"""
+        d = {'number': self.number, 'word': self.word, 'pos': self.pos,
+             'meaning': self.meaning, 'nuance': self.nuance}
+        if self.etymology is not None:
+            d['etymology'] = self.etymology
+        d['example_sections'] = [section.to_dict() for section in self.sections]
+        for field in ('synonyms', 'antonyms', 'related'):
+            d[field] = [ref.to_dict() for ref in getattr(self, field)]
+        return d
@@ -0,0 +1,191 @@
+import json
+import re
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+
+from fileutil import remove_stale_files, write_if_changed
+
+# index.html の検索で使うインデックスの出力先
+SEARCH_DIR = Path('search')
+SEARCH_INDEX_VERSION = 2
+# 行データ（番号・単語・ファイル名・意味）を何件ずつ1ファイルにまとめるか
+ROW_CHUNK_SIZE = 512
+# ASCII英数字以外（日本語など）の文字をまとめるシャード数
+SHARD_BUCKETS = 32
+
+# 意味の正規化（index.html の検索スクリプトの foldText / splitSenses と同じ規則にすること）
+# 【名】〔形〕〈可算〉のような品詞・注記のラベルは中身ごと除き、区切りとして扱う
+LABEL_RE = re.compile(r'【[^】]*】|〔[^〕]*〕|〈[^〉]*〉')
+# 語義の区切り（読点・スラッシュ・空白・丸数字）
+SENSE_SPLIT_RE = re.compile(r'[\s、，,;；/／\u2460-\u2473\u3251-\u325f\u32b1-\u32bf]+')
+# 括弧・波ダッシュなどの記号は文字だけ取り除く（「（布を）織る」→「布を織る」）
+FOLD_STRIP_RE = re.compile(r'[()（）〜～~「」『』\[\]…]')
+WHITESPACE_RE = re.compile(r'\s+')
+KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+
+def get_shard_name(ch):
+    """gram の先頭文字からシャード名を決める（ASCII英数字は1文字ごと、それ以外はバケット）"""
+    if ch.isascii() and ch.isalnum():
+        return ch
+    return f"u{ord(ch) % SHARD_BUCKETS:02x}"
+
+
+def serialize_row(row):
+    """一覧の1行（タプル）を JSON 用の配列にする"""
+    display_id, display_name, filename, meaning, is_sub = row
+    return [display_id, display_name, filename, meaning, 1 if is_sub else 0]
+
+
+def fold_text(text):
+    """検索用に文字の揺れをそろえる（記号除去・NFKC・小文字化・カタカナ→ひらがな）"""
+    text = unicodedata.normalize('NFKC', FOLD_STRIP_RE.sub('', text)).lower()
+    return WHITESPACE_RE.sub(' ', text.translate(KATAKANA_TO_HIRAGANA)).strip()
+
+
+def split_meaning(meaning):
+    """意味を語義ごとの (元の文字列, 正規化した文字列) に分ける（正規化すると空になるものは除く）"""
+    senses = []
+    for part in SENSE_SPLIT_RE.split(LABEL_RE.sub(' ', meaning)):
+        folded = fold_text(part)
+        if folded:
+            senses.append((part.strip(), folded))
+    return senses
+
+
+def split_senses(meaning):
+    """意味を語義ごとに分けて正規化する（例: "【名】①資本（金） ②首都" → ["資本金", "首都"]）"""
+    return [folded for _part, folded in split_meaning(meaning)]
+
+
+def get_search_fields(row):
+    """検索対象のフィールド（番号・単語・語義ごとの意味）を正規化して返す。
+    語義を分けておくと、語義をまたいだ文字の並びで誤ってヒットしない"""
+    display_id, display_name, _filename, meaning, _is_sub = row
+    return [f for f in (fold_text(display_id), fold_text(display_name)) if f] + split_senses(meaning)
+
+
+def get_headword_trigrams(display_name):
+    """綴りの誤り（recieve など）に強い検索用の文字 trigram。語頭・語末は ^ / $ で区別する"""
+    text = f"^{fold_text(display_name)}$"
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def get_trigram_shard_name(gram):
+    """trigram は真ん中の文字でシャードに分ける（先頭は ^ が多く偏るため）"""
+    return get_shard_name(gram[1])
+
+
+def extract_grams(field):
+    """フィールドから索引キーを作る。
+    2文字以上の検索は bigram の積集合で、1文字の検索は unigram で引く。
+    ASCII の unigram は先頭文字のみ（"e" で全件ヒットしないよう前方一致扱い）"""
+    grams = {field[i:i + 2] for i in range(len(field) - 1)}
+    grams.add(field[0])
+    grams.update(ch for ch in field if not ch.isascii())
+    return grams
+
+
+def encode_postings(postings, shard_name):
+    """{gram: 行番号の集合} を {シャード名: {gram: [行番号の差分列]}} にする"""
+    shards = defaultdict(dict)
+    for gram in sorted(postings):
+        # 昇順の行番号を差分で持つと JSON が小さくなる
+        ids = sorted(postings[gram])
+        shards[shard_name(gram)][gram] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+    return shards
+
+
+def get_row_grams(row):
+    """1行分の (部分一致用の索引キーの集合, 見出し語の trigram の集合)"""
+    grams = set()
+    for field in get_search_fields(row):
+        grams |= extract_grams(field)
+    return grams, get_headword_trigrams(row[1])
+
+
+def update_postings(postings, row_id, old_grams, new_grams):
+    """1行分の索引キーの増減を転置リストに反映し、増減のあったキーを返す"""
+    for gram in old_grams - new_grams:
+        postings[gram].discard(row_id)
+        if not postings[gram]:
+            del postings[gram]
+    for gram in new_grams - old_grams:
+        postings[gram].add(row_id)
+    return old_grams ^ new_grams
+
+
+def reencode_shards(shards, postings, shard_name, names):
+    """前回のシャードのうち names のものだけを転置リストから作り直す（空になったシャードは除く）"""
+    shards = {name: shard for name, shard in shards.items() if name not in names}
+    shards.update(encode_postings({gram: ids for gram, ids in postings.items() if shard_name(gram) in names},
+                                  shard_name))
+    return shards
+
+
+def build_search_index(rows, cache=None):
+    """行データのリストから (部分一致用の bigram シャード, 見出し語の trigram シャード) を作る。
+    cache（dict）を渡すと転置リストとシャードを覚えておき、次回は行数が同じなら（行番号がずれないので）
+    内容の変わった行の分だけ転置リストを更新し、増減のあったキーを含むシャードだけをエンコードし直す"""
+    previous = cache.get('rows') if cache else None
+    if previous is not None and len(previous) == len(rows):
+        postings, trigrams = cache['postings'], cache['trigrams']
+        changed_ids = [row_id for row_id, (old, new) in enumerate(zip(previous, rows)) if old != new]
+    else:
+        previous = None
+        postings, trigrams = defaultdict(set), defaultdict(set)
+        changed_ids = range(len(rows))
+
+    touched, touched_trigrams = set(), set()
+    for row_id in changed_ids:
+        old_grams, old_trigrams = get_row_grams(previous[row_id]) if previous else (set(), set())
+        new_grams, new_trigrams = get_row_grams(rows[row_id])
+        touched |= update_postings(postings, row_id, old_grams, new_grams)
+        touched_trigrams |= update_postings(trigrams, row_id, old_trigrams, new_trigrams)
+
+    def shard_name(gram):
+        return get_shard_name(gram[0])
+
+    if previous is None:
+        shards = encode_postings(postings, shard_name)
+        trigram_shards = encode_postings(trigrams, get_trigram_shard_name)
+    else:
+        shards = reencode_shards(cache['shards'], postings, shard_name, {shard_name(g) for g in touched})
+        trigram_shards = reencode_shards(cache['trigram_shards'], trigrams, get_trigram_shard_name,
+                                         {get_trigram_shard_name(g) for g in touched_trigrams})
+    if cache is not None:
+        cache.update(rows=list(rows), postings=postings, trigrams=trigrams, shards=shards,
+                     trigram_shards=trigram_shards)
+    return shards, trigram_shards
+
+
+def write_search_index(rows, out_dir=SEARCH_DIR, cache=None):
+    """検索インデックス（メタ情報・シャード・行データ）を書き出す。変更のないファイルは触らない。
+    cache は build_search_index を参照"""
+    out_dir = Path(out_dir)
+    shards, trigram_shards = build_search_index(rows, cache)
+    written = {}
+
+    for name, postings in shards.items():
+        written[f"shard-{name}.json"] = postings
+    for name, postings in trigram_shards.items():
+        written[f"tri-{name}.json"] = postings
+    for start in range(0, len(rows), ROW_CHUNK_SIZE):
+        chunk = [serialize_row(row) for row in rows[start:start + ROW_CHUNK_SIZE]]
+        written[f"rows-{start // ROW_CHUNK_SIZE}.json"] = chunk
+    written['meta.json'] = {
+        'version': SEARCH_INDEX_VERSION,
+        'count': len(rows),
+        'chunk': ROW_CHUNK_SIZE,
+        'buckets': SHARD_BUCKETS,
+        'shards': sorted(shards),
+        'trigram_shards': sorted(trigram_shards),
+    }
+
+    changed = 0
+    for filename, payload in written.items():
+        text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+        changed += write_if_changed(out_dir / filename, text)
+    removed = remove_stale_files(out_dir, set(written), '*.json')
+    print(f"🔎 検索インデックス: {len(written)} ファイル（更新 {changed} / 削除 {len(removed)}）")
@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import importlib
+import mimetypes
+import os
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import build
+import build_index
+import config
+import corpus
+import generate_exercise
+
+# ブラウザに再読み込みを通知するエンドポイント（Server-Sent Events）。
+# window.__livereload があると sw-register.js はサービスワーカーを使わない（再読み込みで最新を表示するため）
+LIVERELOAD_PATH = '/__livereload'
+LIVERELOAD_SCRIPT = (
+    "<script>window.__livereload = true; new EventSource('" + LIVERELOAD_PATH + "')"
+    ".addEventListener('reload', () => location.reload());</script>"
+)
+# 監視間隔（秒）
+WATCH_INTERVAL = 0.3
+
+
+# ==========================================
+# 1. ファイル監視と再ビルド
+# ==========================================
+def snapshot_sources():
+    """監視対象（vocabulary_data*.json と config.py）の (mtime, size) を取得"""
+    snapshot = {}
+    for path in corpus.list_vocabulary_files() + ['config.py']:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def reload_config():
+    """config.py を読み込み直し、CHAPTER_MAP を参照しているモジュールにも反映する"""
+    importlib.reload(config)
+    importlib.reload(build_index)
+    importlib.reload(generate_exercise)
+
+
+# 監視中に実行するステージ。sw-register.js はライブリロード中はサービスワーカーを使わないので sw は作らない
+WATCH_STAGES = ['pages', 'index', 'exercise']
+
+
+def rebuild(context, changed_paths):
+    """変更のあったファイルに応じて再ビルドする。
+    JSON はキャッシュにより変更ファイルだけ解析し直し、単語ページはマニフェストで変更分だけ書き出す。
+    一覧のチャプター別データ・検索インデックス・演習データは、前回の単語と比べて変わったチャプターの分だけ作り直す"""
+    started = time.perf_counter()
+    if 'config.py' in changed_paths:
+        reload_config()
+        # チャプターの区切りが変わるので、前回との比較や途中結果は使わず全体を作り直す
+        context.pop('words', None)
+        context.pop('cache', None)
+    build.run_stages(context, WATCH_STAGES)
+    print(f"⚡ 再ビルド完了 ({time.perf_counter() - started:.2f}s): {', '.join(sorted(changed_paths))}")
+
+
+class DevServer:
+    """静的ファイル配信 + ライブリロード + ファイル監視の開発用サーバー"""
+
+    def __init__(self, root, context, watch):
+        self.root = Path(root).resolve()
+        self.context = context
+        self.watch = watch
+        self.clients = set()
+
+    # ---- 監視 ----
+    async def watch_sources(self):
+        loop = asyncio.get_running_loop()
+        previous = snapshot_sources()
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            current = snapshot_sources()
+            changed = {path for path in set(previous) | set(current) if previous.get(path) != current.get(path)}
+            if not changed:
+                continue
+            previous = current
+            try:
+                # ビルドは同期処理なのでスレッドで実行し、その間もリクエストには応答する
+                await loop.run_in_executor(None, rebuild, self.context, changed)
+            except Exception as e:
+                print(f"⚠ 再ビルドに失敗しました: {e}")
+                continue
+            self.notify_reload()
+
+    def notify_reload(self):
+        for queue in list(self.clients):
+            queue.put_nowait('reload')
+
+    # ---- HTTP ----
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass  # ヘッダーは使わない
+            parts = request_line.decode('latin-1').split()
+            if len(parts) < 2:
+                return
+            method, target = parts[0], parts[1]
+            path = unquote(urlsplit(target).path)
+
+            if method not in ('GET', 'HEAD'):
+                await self.send(writer, 405, b'Method Not Allowed', 'text/plain; charset=utf-8')
+            elif path == LIVERELOAD_PATH:
+                await self.stream_events(writer)
+            else:
+                await self.send_file(writer, path, head=(method == 'HEAD'))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def send(self, writer, status, body, content_type, head=False):
+        reason = {200: 'OK', 404: 'Not Found', 405: 'Method Not Allowed'}.get(status, '')
+        headers = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Cache-Control: no-cache\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(headers.encode('latin-1'))
+        if not head:
+            writer.write(body)
+        await writer.drain()
+
+    def resolve(self, path):
+        """URLパスを公開ディレクトリ内のファイルに変換（外側へのアクセスは拒否）"""
+        candidate = (self.root / path.lstrip('/')).resolve()
+        if candidate != self.root and self.root not in candidate.parents:
+            return None
+        if candidate.is_dir():
+            candidate = candidate / 'index.html'
+        return candidate if candidate.is_file() else None
+
+    async def send_file(self, writer, path, head=False):
+        filepath = self.resolve(path)
+        if filepath is None:
+            await self.send(writer, 404, b'Not Found', 'text/plain; charset=utf-8', head)
+            return
+        body = filepath.read_bytes()
+        content_type = mimetypes.guess_type(filepath.name)[0] or 'application/octet-stream'
+        if content_type == 'text/html':
+            if self.watch:
+                body = body.replace(b'</body>', LIVERELOAD_SCRIPT.encode('utf-8') + b'</body>', 1)
+            content_type += '; charset=utf-8'
+        elif content_type in ('application/json', 'text/css', 'text/javascript'):
+            content_type += '; charset=utf-8'
+        await self.send(writer, 200, body, content_type, head)
+
+    async def stream_events(self, writer):
+        queue = asyncio.Queue()
+        self.clients.add(queue)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+        await writer.drain()
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                    writer.write(f"event: {event}\ndata: {event}\n\n".encode('utf-8'))
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                await writer.drain()
+        finally:
+            self.clients.discard(queue)
+
+    async def run(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"🌐 http://{host}:{port}/ で配信中" + ("（ファイル監視中）" if self.watch else ""))
+        async with server:
+            if self.watch:
+                asyncio.create_task(self.watch_sources())
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ローカル開発用サーバー（--watch で変更時に再生成してブラウザを再読み込み）')
+    parser.add_argument('--watch', action='store_true', help='vocabulary_data*.json と config.py を監視して再ビルド')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--sharded-index', action='store_true', help='index.html をシャード化モードで生成')
+    args = parser.parse_args()
+
+    context = {'force': False, 'jobs': 1, 'sharded_index': args.sharded_index, 'minify': False,
+               'incremental': args.watch}
+    if args.watch:
+        # 起動時に一度ビルドして、出力と前回の単語（差分の基準）を用意しておく
+        build.run_stages(context, WATCH_STAGES)
+    try:
+        asyncio.run(DevServer('.', context, args.watch).run(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
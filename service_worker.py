@@ -0,0 +1,211 @@
+import argparse
+import hashlib
+import json
+import re
+from glob import glob
+from pathlib import Path
+
+import metrics
+from fileutil import write_if_changed
+
+# オフライン用のサービスワーカー sw.js と、内容ハッシュ付きのキャッシュ対象一覧を生成する。
+#   precache: 一覧・演習ページの骨組み。インストール時にまとめて取得（ハッシュが変わったものだけ）
+#   runtime:  単語ページ・演習データ・検索データ。開いたときにキャッシュし、裏で更新（stale-while-revalidate）
+# 再ビルド後は、新旧の一覧でハッシュが変わったエントリだけを捨てる。
+
+SW_PATH = Path('sw.js')
+SW_MANIFEST_PATH = Path('sw-manifest.json')
+SW_REGISTER_PATH = Path('sw-register.js')
+SW_MANIFEST_VERSION = 1
+
+PRECACHE_PATTERNS = [
+    'index.html',
+    'exercise.html',
+    'sw-register.js',
+    'assets/*.css',
+    'index_data/*.json',
+    'search/meta.json',
+]
+RUNTIME_PATTERNS = [
+    'data/*.html',
+    'exercise_data/*.json',
+    'search/*.json',
+]
+
+# 各ページから読み込む登録用スクリプト（data/ のページからも sw.js の位置を正しく解決する）。
+# serve.py --watch のライブリロード中（window.__livereload）は、キャッシュした古いページが
+# 再読み込みで表示されないよう登録せず、前に登録したものも解除する
+SW_REGISTER_SCRIPT = """// サービスワーカーを登録する（service_worker.py が生成）
+(function () {
+    if (!('serviceWorker' in navigator) || location.protocol === 'file:') return;
+    const swUrl = new URL('sw.js', document.currentScript.src);
+    window.addEventListener('load', () => {
+        if (window.__livereload) {
+            navigator.serviceWorker.getRegistrations()
+                .then(registrations => registrations.forEach(r => r.unregister()));
+            return;
+        }
+        navigator.serviceWorker.register(swUrl).catch(e => console.warn('service worker:', e));
+    });
+})();
+"""
+
+# sw.js の本体（先頭に VERSION / PRECACHE / RUNTIME_PATTERNS の定義を付けて出力）
+SW_SCRIPT = """const PRECACHE_CACHE = 'vocab-precache';
+const RUNTIME_CACHE = 'vocab-runtime';
+const META_CACHE = 'vocab-sw-meta';
+const MANIFEST_URL = 'sw-manifest.json';
+const SCOPE = new URL(self.registration.scope);
+
+// scope からの相対パス（scope 外なら null）
+function toPath(url) {
+    const u = new URL(url, SCOPE);
+    if (u.origin !== SCOPE.origin || !u.pathname.startsWith(SCOPE.pathname)) return null;
+    const path = decodeURIComponent(u.pathname.slice(SCOPE.pathname.length));
+    return path === '' ? 'index.html' : path;
+}
+
+// precache のキーには内容ハッシュを付ける（ハッシュが同じなら取り直さない）
+function versioned(path) {
+    return new URL(`${path}?v=${PRECACHE[path]}`, SCOPE).href;
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(PRECACHE_CACHE);
+        await Promise.all(Object.keys(PRECACHE).map(async path => {
+            const key = versioned(path);
+            if (await cache.match(key)) return;
+            const response = await fetch(new URL(path, SCOPE), { cache: 'no-cache' });
+            if (!response.ok) throw new Error(`${path}: ${response.status}`);
+            await cache.put(key, response);
+        }));
+        await self.skipWaiting();
+    })());
+});
+
+// 新旧の sw-manifest.json を比べて、ハッシュが変わった（または無くなった）runtime エントリだけを削除
+async function invalidateRuntime() {
+    const meta = await caches.open(META_CACHE);
+    const stored = await meta.match(MANIFEST_URL);
+    const previous = stored ? await stored.json() : null;
+    let response;
+    try {
+        response = await fetch(new URL(MANIFEST_URL, SCOPE), { cache: 'no-cache' });
+    } catch (e) {
+        return;
+    }
+    if (!response.ok) return;
+    const current = await response.clone().json();
+    const runtime = await caches.open(RUNTIME_CACHE);
+    for (const request of await runtime.keys()) {
+        const path = toPath(request.url);
+        const hash = current.runtime[path];
+        if (!hash || !previous || previous.runtime[path] !== hash) await runtime.delete(request);
+    }
+    await meta.put(MANIFEST_URL, response);
+}
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        const precache = await caches.open(PRECACHE_CACHE);
+        const keep = new Set(Object.keys(PRECACHE).map(versioned));
+        for (const request of await precache.keys()) {
+            if (!keep.has(request.url)) await precache.delete(request);
+        }
+        await invalidateRuntime();
+        await self.clients.claim();
+    })());
+});
+
+async function cacheFirst(path, request) {
+    const cache = await caches.open(PRECACHE_CACHE);
+    return (await cache.match(versioned(path))) || fetch(request);
+}
+
+async function staleWhileRevalidate(path, event) {
+    const cache = await caches.open(RUNTIME_CACHE);
+    const key = new URL(path, SCOPE).href;
+    const cached = await cache.match(key);
+    const network = fetch(event.request).then(response => {
+        if (response.ok) return cache.put(key, response.clone()).then(() => response);
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(network.catch(() => {}));
+        return cached;
+    }
+    return network;
+}
+
+self.addEventListener('fetch', event => {
+    if (event.request.method !== 'GET') return;
+    const path = toPath(event.request.url);
+    if (path === null) return;
+    if (Object.prototype.hasOwnProperty.call(PRECACHE, path)) {
+        event.respondWith(cacheFirst(path, event.request));
+    } else if (RUNTIME_PATTERNS.some(re => re.test(path))) {
+        event.respondWith(staleWhileRevalidate(path, event));
+    }
+});
+"""
+
+
+def glob_to_js_regex(pattern):
+    """'data/*.html' のような glob を JavaScript の正規表現の文字列にする（* は / をまたがない）"""
+    return '^' + '[^/]*'.join(re.escape(part) for part in pattern.split('*')) + '$'
+
+
+def hash_files(patterns, exclude=()):
+    """パターンに一致するファイルの パス → 内容ハッシュ（先頭12桁）、パス順"""
+    paths = set()
+    for pattern in patterns:
+        paths.update(Path(p).as_posix() for p in glob(pattern))
+    hashes = {}
+    for path in sorted(paths - set(exclude)):
+        raw = Path(path).read_bytes()
+        metrics.add_io(bytes_read=len(raw), files_read=1)
+        hashes[path] = hashlib.sha256(raw).hexdigest()[:12]
+    return hashes
+
+
+def build_sw_manifest():
+    """precache / runtime それぞれの パス → 内容ハッシュ と、全体のバージョンを作る"""
+    precache = hash_files(PRECACHE_PATTERNS)
+    runtime = hash_files(RUNTIME_PATTERNS, exclude=precache)
+    payload = json.dumps([precache, runtime], sort_keys=True, separators=(',', ':'))
+    return {
+        'version': SW_MANIFEST_VERSION,
+        'build': hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12],
+        'precache': precache,
+        'runtime': runtime,
+    }
+
+
+def render_service_worker(manifest):
+    """sw.js の内容。一覧の内容が変われば sw.js のバイト列も変わり、ブラウザが更新を検知する"""
+    header = [
+        "// オフライン用サービスワーカー（service_worker.py が生成。直接編集しない）",
+        f"const VERSION = {json.dumps(manifest['build'])};",
+        f"const PRECACHE = {json.dumps(manifest['precache'], ensure_ascii=False, indent=1)};",
+        f"const RUNTIME_PATTERNS = {json.dumps([glob_to_js_regex(p) for p in RUNTIME_PATTERNS])}"
+        ".map(source => new RegExp(source));",
+    ]
+    return '\n'.join(header) + '\n' + SW_SCRIPT
+
+
+def generate_service_worker():
+    """sw-register.js・sw-manifest.json・sw.js を書き出し、マニフェストを返す"""
+    # 登録スクリプト自体も precache するので先に書く
+    write_if_changed(SW_REGISTER_PATH, SW_REGISTER_SCRIPT)
+    manifest = build_sw_manifest()
+    write_if_changed(SW_MANIFEST_PATH, json.dumps(manifest, ensure_ascii=False, indent=1) + '\n')
+    changed = write_if_changed(SW_PATH, render_service_worker(manifest))
+    print(f"📴 サービスワーカー: precache {len(manifest['precache'])} 件 / runtime {len(manifest['runtime'])} 件"
+          f"（{manifest['build']}{'、更新' if changed else '、変更なし'}）")
+    return manifest
+
+
+if __name__ == '__main__':
+    argparse.ArgumentParser(description='生成済みのページから sw.js と sw-manifest.json を作成').parse_args()
+    generate_service_worker()
@@ -0,0 +1,87 @@
+import os
+from pathlib import Path
+from string import Formatter
+
+import metrics
+
+# str.format と同じ書式（{name}）のテンプレートを、読み込み時に一度だけ
+# 「固定文字列」と「差し込み口」の列にコンパイルしておく小さなレンダラー。
+# 差し込む値はここで一括してエスケープする（Markup で包んだ値だけはそのまま出す）。
+#   {name}       テキストとしてエスケープ（& < >）
+#   {name:attr}  属性値としてエスケープ（& < > " '）
+
+
+class Markup(str):
+    """エスケープ済み（またはそのまま出してよい）HTML 文字列"""
+    __slots__ = ()
+
+
+def escape(value):
+    """テキスト用のエスケープ。Markup はそのまま返す"""
+    if isinstance(value, Markup):
+        return value
+    text = str(value)
+    if '&' in text or '<' in text or '>' in text:
+        text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return text
+
+
+def escape_attr(value):
+    """属性値用のエスケープ（引用符も置き換える）"""
+    if isinstance(value, Markup):
+        return value
+    return escape(value).replace('"', '&quot;').replace("'", '&#x27;')
+
+
+def allow_breaks(value):
+    """エスケープしたうえで <br> だけは改行タグとして残す（語源欄など）"""
+    return Markup(escape(value).replace('&lt;br&gt;', '<br>'))
+
+
+ESCAPERS = {'': escape, 'attr': escape_attr}
+
+
+class Template:
+    """コンパイル済みテンプレート。parts は (固定文字列, 差し込み口名, エスケープ関数) の列"""
+    __slots__ = ('parts', 'fields')
+
+    def __init__(self, source):
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if field is None:
+                parts.append((literal, None, None))
+                continue
+            if conversion or spec not in ESCAPERS:
+                raise ValueError(f"未対応の書式です: {{{field}!{conversion}:{spec}}}")
+            parts.append((literal, field, ESCAPERS[spec]))
+        self.parts = tuple(parts)
+        self.fields = frozenset(field for _, field, _ in parts if field is not None)
+
+    def render_into(self, out, values):
+        """out（list）に出力片を追加する。値が list のときは描画済みの出力片としてそのまま連結"""
+        append = out.append
+        for literal, field, escaper in self.parts:
+            if literal:
+                append(literal)
+            if field is not None:
+                value = values[field]
+                if type(value) is list:
+                    out.extend(value)
+                else:
+                    append(escaper(value))
+        return out
+
+    def render(self, **values):
+        return ''.join(self.render_into([], values))
+
+
+def write_parts(path, parts):
+    """出力片の列をファイルへ順に書き出す（一時ファイル経由で置き換え）。書き込んだバイト数を返す"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.writelines(parts)
+    size = os.path.getsize(tmp_path)
+    os.replace(tmp_path, path)
+    metrics.add_io(bytes_written=size, files_written=1)
+    return size
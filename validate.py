@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import re
+import sys
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+from chapters import build_chapter_index, find_chapter
+from corpus import iter_file_records, list_vocabulary_files
+from models import normalize_headword
+
+# vocabulary_data*.json のスキーマ: 項目名 → (許される型, 必須か)
+WORD_SCHEMA = {
+    'number': ((int, str), True),
+    'word': (str, True),
+    'pos': (str, True),
+    'meaning': (str, True),
+    'nuance': (str, True),
+    'etymology': (str, False),
+    'example_sections': (list, False),
+    'examples': (list, False),
+    'synonyms': (list, False),
+    'antonyms': (list, False),
+    'related': (list, False),
+}
+SECTION_SCHEMA = {'title': (str, True), 'examples': (list, True)}
+EXAMPLE_SCHEMA = {'en': (str, True), 'ja': (str, True), 'highlight': (str, False)}
+REF_SCHEMA = {'word': (str, True), 'trans': (str, True), 'link': (str, False)}
+REF_FIELDS = ('synonyms', 'antonyms', 'related')
+# 番号は 422 または "422" / "422-2"
+NUMBER_RE = re.compile(r'\d+(-\d+)?')
+
+
+# ==========================================
+# 1. ファイル単位の検査（ワーカープロセスで並列実行）
+# ==========================================
+def check_fields(value, schema, where):
+    """dict が schema を満たすか調べ、エラーメッセージのリストを返す"""
+    if not isinstance(value, dict):
+        return [f"{where}: オブジェクトではありません"]
+    errors = []
+    for field, (types, required) in schema.items():
+        if field not in value:
+            if required:
+                errors.append(f"{where}: 必須項目 '{field}' がありません")
+            continue
+        # bool は int のサブクラスなので別に弾く
+        if not isinstance(value[field], types) or isinstance(value[field], bool):
+            expected = ' / '.join(t.__name__ for t in (types if isinstance(types, tuple) else (types,)))
+            errors.append(f"{where}: '{field}' は {expected} である必要があります"
+                          f"（{type(value[field]).__name__}）")
+    return errors
+
+
+def check_word(record):
+    """1語分のエラーメッセージのリスト"""
+    errors = check_fields(record, WORD_SCHEMA, 'word')
+    if errors and not isinstance(record, dict):
+        return errors
+    number = record.get('number')
+    if isinstance(number, int) and not isinstance(number, bool):
+        if number <= 0:
+            errors.append(f"number: 正の整数である必要があります（{number}）")
+    elif isinstance(number, str) and not NUMBER_RE.fullmatch(number):
+        errors.append(f"number: '{number}' は 422 または \"422-2\" の形式である必要があります")
+    sections = record.get('example_sections')
+    for s, section in enumerate(sections if isinstance(sections, list) else []):
+        errors += check_fields(section, SECTION_SCHEMA, f"example_sections[{s}]")
+        if isinstance(section, dict) and isinstance(section.get('examples'), list):
+            for e, example in enumerate(section['examples']):
+                errors += check_fields(example, EXAMPLE_SCHEMA, f"example_sections[{s}].examples[{e}]")
+    for field in REF_FIELDS:
+        refs = record.get(field)
+        if isinstance(refs, list):
+            for r, ref in enumerate(refs):
+                errors += check_fields(ref, REF_SCHEMA, f"{field}[{r}]")
+    return errors
+
+
+def get_line_number(line_starts, offset):
+    """バイト位置から行番号（1始まり）を求める"""
+    return bisect_right(line_starts, offset)
+
+
+def validate_file(json_file):
+    """ワーカー: 1ファイルを検査し、(エラー, 各語の要約) を返す。
+    要約 (番号, 見出し語, 行) は親プロセスでファイルをまたいだ重複検査に使う"""
+    errors = []
+    entries = []
+    with open(json_file, 'rb') as f:
+        raw = f.read()
+    # まず全体を解析して、構文エラーなら位置を報告して終わる
+    try:
+        data = json.loads(raw.decode('utf-8'))
+    except UnicodeDecodeError as e:
+        return [(json_file, None, f"UTF-8 として読めません: {e}")], entries
+    except json.JSONDecodeError as e:
+        return [(json_file, e.lineno, f"JSON の構文エラー: {e.msg}（{e.colno} 文字目）")], entries
+    if not isinstance(data, dict) or not isinstance(data.get('words'), list):
+        return [(json_file, 1, "トップレベルは {\"words\": [...]} である必要があります")], entries
+
+    line_starts = [0] + [m.end() for m in re.finditer(b'\n', raw)]
+    for offset, _size, record in iter_file_records(json_file):
+        line = get_line_number(line_starts, offset)
+        for message in check_word(record):
+            errors.append((json_file, line, message))
+        if isinstance(record, dict) and isinstance(record.get('number'), (int, str)):
+            number = str(record['number'])
+            if NUMBER_RE.fullmatch(number):
+                entries.append((number, record.get('word') if isinstance(record.get('word'), str) else None, line))
+    return errors, entries
+
+
+# ==========================================
+# 2. ファイルをまたいだ検査
+# ==========================================
+def check_corpus(entries_by_file, chapter_index):
+    """番号の重複・見出し語の重複・親のないサブ単語・どのチャプターにも入らない番号を調べる。
+    (エラー, 警告) を返す（見出し語の重複は教材上ありうるので警告）"""
+    errors = []
+    warnings = []
+    numbers = {}
+    headwords = {}
+    main_numbers = set()
+    subs = []
+
+    for json_file, entries in entries_by_file:
+        for number, word, line in entries:
+            where = (json_file, line)
+            if number in numbers:
+                first = numbers[number]
+                errors.append((*where, f"番号 {number} が重複しています（最初: {first[0]}:{first[1]}）。"
+                                       f"data/ のページが上書きされます"))
+            else:
+                numbers[number] = where
+
+            main_num, _, sub_num = number.partition('-')
+            if sub_num:
+                subs.append((int(main_num), number, where))
+            else:
+                main_numbers.add(int(main_num))
+                if word is not None:
+                    key = normalize_headword(word)
+                    if key in headwords:
+                        first = headwords[key]
+                        warnings.append((*where, f"見出し語 '{word}' が重複しています"
+                                                 f"（最初: {first[0]}:{first[1]}）"))
+                    else:
+                        headwords[key] = where
+
+            if find_chapter(chapter_index, int(main_num)) is None:
+                errors.append((*where, f"番号 {number} は CHAPTER_MAP のどの範囲にも入りません"
+                                       f"（最初の章は {chapter_index[0]} から）"))
+
+    for main_num, number, where in subs:
+        if main_num not in main_numbers:
+            errors.append((*where, f"サブ単語 {number} に対応するメイン単語 {main_num} がありません"))
+    return errors, warnings
+
+
+def validate(json_files=None, jobs=None):
+    """すべてのファイルを並列に検査し、(エラー, 警告) をファイル・行順に返す"""
+    if json_files is None:
+        json_files = list_vocabulary_files()
+    chapter_index = build_chapter_index()
+    errors = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(validate_file, json_files))
+    for file_errors, _entries in results:
+        errors += file_errors
+    corpus_errors, warnings = check_corpus(
+        [(json_file, entries) for json_file, (_errors, entries) in zip(json_files, results)], chapter_index)
+    errors += corpus_errors
+    order = {json_file: i for i, json_file in enumerate(json_files)}
+    sort_key = lambda e: (order.get(e[0], 0), e[1] or 0)
+    return sorted(errors, key=sort_key), sorted(warnings, key=sort_key)
+
+
+def print_problems(label, problems, limit=None):
+    shown = problems if limit is None else problems[:limit]
+    for json_file, line, message in shown:
+        location = f"{json_file}:{line}" if line else json_file
+        print(f"{label} {location}: {message}")
+    if len(shown) < len(problems):
+        print(f"   ...ほか {len(problems) - len(shown)} 件（--verbose ですべて表示）")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='vocabulary_data*.json のスキーマ・番号の重複・章の範囲を検査')
+    parser.add_argument('--jobs', '-j', type=int, default=0, help='ワーカープロセス数（0 でCPUコア数）')
+    parser.add_argument('--strict', action='store_true', help='警告（見出し語の重複）もエラーとして扱う')
+    parser.add_argument('--verbose', '-v', action='store_true', help='警告をすべて表示')
+    args = parser.parse_args()
+
+    json_files = list_vocabulary_files()
+    errors, warnings = validate(json_files, jobs=args.jobs or os.cpu_count() or 1)
+    print_problems('✗', errors)
+    print_problems('⚠', warnings, limit=None if args.verbose else 10)
+    print(f"\n{len(json_files)} ファイル: エラー {len(errors)} 件 / 警告 {len(warnings)} 件")
+    if errors or (args.strict and warnings):
+        sys.exit(1)
+    print("✓ 検証に成功しました")